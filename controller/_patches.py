@@ -0,0 +1,146 @@
+"""
+One-time compatibility patches shared by the live controller scripts.
+
+- openai 1.x ``Completions.create`` (or, on openai < 1.0, the legacy
+  ``ChatCompletion.create``) drops the ``encoding`` kwarg that the pinned
+  LangChain still passes. The installed version is probed once to pick which.
+- ``Completions.create`` waits on an optional per-minute request/token budget
+  (``set_rate_limit`` for the process, ``set_key_pool`` per API key) so many
+  concurrent agents stay under the account limits.
+- ``requests.Response.json`` returns a stub dict instead of raising when the
+  Mineflayer bridge answers with non-JSON text.
+
+Every wrapper is tagged with ``_patched`` so importing this from several entry
+points, or calling ``apply_all`` twice, never stacks wrappers.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import logging
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+from controller.rate_limit import KeyPool, TokenBucket, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Set by set_rate_limit() / set_key_pool(); None leaves chat completions unthrottled.
+_rate_limiter: Optional[TokenBucket] = None
+_key_pool: Optional[KeyPool] = None
+
+
+def set_rate_limit(rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+    """
+    Throttle every patched ``Completions.create`` call in this process to ``rpm``
+    requests and ``tpm`` tokens per minute; both None removes the limit.
+    """
+    global _rate_limiter
+    _rate_limiter = TokenBucket(rpm, tpm) if (rpm or tpm) else None
+
+
+def set_key_pool(pool: Optional[KeyPool]) -> None:
+    """
+    Throttle each patched ``Completions.create`` call against the bucket of the
+    API key its client was built with; None removes the per-key limits.
+    """
+    global _key_pool
+    _key_pool = pool
+
+
+def openai_version() -> Optional[Tuple[int, ...]]:
+    """
+    ``(major, minor)`` of the installed openai package, or None when it is missing.
+    """
+    if importlib.util.find_spec("openai") is None:
+        return None
+    import openai
+
+    return tuple(int(x) for x in openai.__version__.split(".")[:2] if x.isdigit())
+
+
+def patch_chat_completions() -> None:
+    from openai.resources.chat.completions import Completions
+
+    orig_create = Completions.create
+    if getattr(orig_create, "_patched", False):
+        return
+
+    # ``encoding`` is bound as a keyword-only parameter and discarded, so the
+    # wrapper never copies or mutates the kwargs dict. ``functools.wraps`` keeps
+    # ``__wrapped__`` so signature introspection still sees the real method.
+    @functools.wraps(orig_create)
+    def _patched_chat_create(self, *args, encoding=None, **kwargs):
+        pool, limiter = _key_pool, _rate_limiter
+        key_bucket = pool.bucket(self._client.api_key) if pool is not None else None
+        if key_bucket is not None or limiter is not None:
+            tokens = estimate_tokens(kwargs)
+            if key_bucket is not None:
+                key_bucket.acquire(tokens)
+            if limiter is not None:
+                limiter.acquire(tokens)
+        return orig_create(self, *args, **kwargs)
+
+    _patched_chat_create._patched = True
+    Completions.create = _patched_chat_create
+    logger.debug("Patched openai.resources.chat.completions.Completions.create to ignore 'encoding' kwarg.")
+
+
+def patch_legacy_chat_completion() -> None:
+    import openai
+
+    orig_create = openai.ChatCompletion.create
+    if getattr(orig_create, "_patched", False):
+        return
+
+    @functools.wraps(orig_create)
+    def _patched_legacy_create(*args, encoding=None, **kwargs):
+        return orig_create(*args, **kwargs)
+
+    _patched_legacy_create._patched = True
+    # ``create`` is a classmethod bound to ChatCompletion already; staticmethod keeps
+    # calls through an instance from passing the instance in as an extra argument.
+    openai.ChatCompletion.create = staticmethod(_patched_legacy_create)
+    logger.debug("Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
+
+
+def patch_response_json() -> None:
+    from requests.models import Response
+
+    orig_json = Response.json
+    if getattr(orig_json, "_patched", False):
+        return
+
+    @functools.wraps(orig_json)
+    def _safe_response_json(self, *args, **kwargs):
+        # Fast path: parse the raw bytes directly, skipping the text decode.
+        if orjson is not None and not args and not kwargs:
+            try:
+                return orjson.loads(self.content)
+            except orjson.JSONDecodeError:
+                pass
+        try:
+            return orig_json(self, *args, **kwargs)
+        except Exception as e:
+            text = self.text or ""
+            print(f"[WARN] Response.json failed ({e}); returning stub. Raw (first 200 chars): {text[:200]!r}")
+            return {"message": text, "status": False, "new_events": []}
+
+    _safe_response_json._patched = True
+    Response.json = _safe_response_json
+    logger.debug("Patched requests.Response.json to return stub on JSON decode error.")
+
+
+def apply_all() -> None:
+    version = openai_version()
+    if version is not None:
+        if version >= (1, 0):
+            patch_chat_completions()
+        else:
+            patch_legacy_chat_completion()
+    patch_response_json()
@@ -1,30 +1,31 @@
 from __future__ import annotations
 
+import itertools
 import json
 import multiprocessing as mp
 import os
+import pickle
 import random
+import signal
+import string
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Sequence
 
-from controller.task_library import TASK_LIBRARY
+from controller.task_library import TASK_LIBRARY, TaskSpec
 from env.env import VillagerBench, env_type
 from env.minecraft_client import Agent
-from ml_models.logger import log_step
+from ml_models.logger import flush_log, log_step
 
 
-DEFAULT_SHORT_TASK_TEMPLATE = """You are {agent}, a Minecraft worker.
+# The static instructions come first and never change between steps, so the
+# provider's automatic prefix cache can reuse them; everything that varies per
+# agent or per step lives in the suffix.
+STATIC_TASK_PREFIX = """You are a Minecraft worker. Each step you are given a high-level task and a
+summary of your last step (see the end of this message).
 
-High-level task:
-
-{task_description}
-
-Last step summary:
-
-{last_step_summary}
-
-You must now choose and execute up to {max_turns} tool calls to move this task forward.
+You must choose and execute up to {max_turns} tool calls to move the task forward.
 Treat the high-level task as a multi-step project that you work on over many steps. Do NOT restart from scratch every time.
 
 Available tools (names MUST match exactly, do NOT invent new tool names):
@@ -70,6 +71,20 @@ Planning:
 Return ONLY the JSON action/tool calls and your final answer in the expected format.
 """
 
+DYNAMIC_TASK_SUFFIX = """
+Your name: {agent}
+
+High-level task:
+
+{task_description}
+
+Last step summary:
+
+{last_step_summary}
+"""
+
+DEFAULT_SHORT_TASK_TEMPLATE = STATIC_TASK_PREFIX + DYNAMIC_TASK_SUFFIX
+
 
 def load_api_keys(path: Optional[str]) -> List[str]:
     if path:
@@ -122,47 +137,163 @@ class WorkerConfig:
     llm_base_url: str
     api_keys: List[str]
     clear_logs: bool
-    task_template: str
-    task_library: Sequence[Dict[str, str]]
+    # None selects DEFAULT_SHORT_TASK_TEMPLATE / TASK_LIBRARY inside the worker,
+    # which already has them imported, so they are not pickled per worker.
+    task_template: Optional[str] = None
+    task_library: Optional[Sequence[TaskSpec]] = None
 
 
 class TaskFeeder:
-    def __init__(self, tasks: Sequence[Dict[str, str]], mode: str, template: str, max_turns: int):
+    def __init__(
+        self,
+        tasks: Sequence[TaskSpec],
+        mode: str,
+        template: str,
+        max_turns: int,
+        rng: Optional[random.Random] = None,
+    ):
         if not tasks:
             raise ValueError("Task library is empty; cannot drive agents.")
-        self.tasks = list(tasks)
+        # TASK_LIBRARY is an immutable tuple; keep a reference rather than a copy.
+        self.tasks = tasks if isinstance(tasks, tuple) else tuple(tasks)
         self.mode = mode
         self.template = template
         self.max_turns = max_turns
-        self._cursor = 0
+        self._rng = rng or random.Random()
+        self._cycle = itertools.cycle(self.tasks) if mode != "random" else None
+        # Pre-split the template once so each step is a plain join instead of a
+        # full str.format parse of the ~2 KB prompt.
+        parts = list(string.Formatter().parse(template))
+        self._literals = tuple(literal for literal, _, _, _ in parts)
+        self._field_order = tuple(field for _, field, _, _ in parts)
+        self._field_specs = tuple((conv, spec) for _, _, spec, conv in parts)
+
+    def _render(self, values: Dict[str, object]) -> str:
+        rendered = []
+        for field, (conv, spec) in zip(self._field_order, self._field_specs):
+            if field is None:
+                rendered.append("")
+                continue
+            value = values[field]
+            if conv == "r":
+                value = repr(value)
+            elif conv == "s":
+                value = str(value)
+            elif conv == "a":
+                value = ascii(value)
+            rendered.append(format(value, spec) if spec else str(value))
+        return "".join(itertools.chain.from_iterable(zip(self._literals, rendered)))
 
     def next_instruction(self, agent_name: str, last_feedback: Optional[str] = None) -> str:
-        if self.mode == "random":
-            spec = random.choice(self.tasks)
+        """
+        Render the prompt for the next step.
+
+        ``last_feedback`` is expected to be already normalised and capped at
+        400 characters (plus "...") by the caller; see ``_normalize_feedback``.
+        """
+        if self._cycle is None:
+            spec = self._rng.choice(self.tasks)
         else:
-            spec = self.tasks[self._cursor % len(self.tasks)]
-            self._cursor += 1
-        description = spec["description"].strip()
+            spec = next(self._cycle)
+        description = spec.description.strip()
         last_summary = (last_feedback or "").strip()
-        if last_summary and len(last_summary) > 400:
-            last_summary = last_summary[:400] + "..."
+        assert len(last_summary) <= 403, "last_feedback must be truncated by the caller"
         if not last_summary:
             last_summary = "No previous step; this is your first action."
-        return self.template.format(
-            agent=agent_name,
-            task_description=description,
-            last_step_summary=last_summary,
-            max_turns=self.max_turns,
-        )
-
+        return self._render({
+            "agent": agent_name,
+            "task_description": description,
+            "last_step_summary": last_summary,
+            "max_turns": self.max_turns,
+        })
+
+
+_FEEDBACK_TRANS = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
+
+def _normalize_feedback(feedback: object) -> str:
+    if isinstance(feedback, str):
+        text = feedback.translate(_FEEDBACK_TRANS).strip()
+    else:
+        text = str(feedback)
+    if len(text) > 400:
+        text = text[:400] + "..."
+    return text
+
+
+class StatusBus:
+    """
+    Parent-side end of the worker status channel.
+
+    Each worker gets its own one-way pipe, so concurrent senders never contend
+    on a shared queue lock or feeder thread. drain() returns whatever is ready
+    without blocking; receive() blocks a listener thread until something
+    arrives or close() is called.
+    """
+
+    def __init__(self):
+        self._readers: List[Connection] = []
+        # Self-pipe so close() can wake a listener blocked in receive().
+        self._wake_reader, self._wake_writer = mp.Pipe(duplex=False)
+        self.closed = False
+
+    def new_sender(self) -> Connection:
+        reader, writer = mp.Pipe(duplex=False)
+        self._readers.append(reader)
+        return writer
+
+    def _read(self, ready: List[Connection]) -> List[Dict[str, Any]]:
+        messages: List[Dict[str, Any]] = []
+        for conn in ready:
+            try:
+                while conn.poll():
+                    messages.append(pickle.loads(conn.recv_bytes()))
+            except (EOFError, OSError):
+                # Worker exited and closed its end.
+                self._readers.remove(conn)
+                conn.close()
+        return messages
+
+    def drain(self) -> List[Dict[str, Any]]:
+        return self._read(wait(self._readers, timeout=0))
+
+    def receive(self) -> List[Dict[str, Any]]:
+        """
+        Block until at least one worker has sent something, or the bus is closed.
+        Once closed, returns what was still buffered and sets ``closed``.
+        """
+        ready = wait(self._readers + [self._wake_reader])
+        if self._wake_reader in ready:
+            self.closed = True
+            return self.drain()
+        return self._read(ready)
+
+    def close(self) -> None:
+        self._wake_writer.send_bytes(b"")
+
+
+def _interrupt_on_sigterm(signum, frame):
+    # join_workers() terminates workers that outlive its deadline; unwind through
+    # worker_entry's cleanup instead of dying with the bridge still running.
+    raise KeyboardInterrupt
+
+
+def worker_entry(cfg: WorkerConfig, stop_event: mp.Event, status_conn: Optional[Connection] = None) -> None:
+    signal.signal(signal.SIGTERM, _interrupt_on_sigterm)
 
-def worker_entry(cfg: WorkerConfig, stop_event: mp.Event, status_queue: Optional[mp.Queue] = None) -> None:
     def send_status(event: str, **payload):
-        if status_queue is not None:
-            status_queue.put({"agent": cfg.agent_name, "event": event, **payload})
+        if status_conn is not None:
+            message = {"agent": cfg.agent_name, "event": event, **payload}
+            try:
+                status_conn.send_bytes(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+            except OSError:
+                # Parent went away; status reporting is best-effort.
+                pass
 
     # NOTE: This worker process owns a single agent + VillagerBench instance.
-    random.seed(os.getpid() + int(time.time()))
+    # Seed from the OS so workers started in the same second do not get
+    # near-identical pid+time seeds.
+    rng = random.Random(int.from_bytes(os.urandom(16), "big"))
     Agent.configure_llm(
         model=cfg.llm_model,
         base_url=cfg.llm_base_url,
@@ -182,33 +313,46 @@ def worker_entry(cfg: WorkerConfig, stop_event: mp.Event, status_queue: Optional
     )
     bench.langchain_model = cfg.llm_model
     bench.agent_register(agent_number=1, name_list=[cfg.agent_name])
-    feeder = TaskFeeder(cfg.task_library, cfg.task_mode, cfg.task_template, cfg.max_turns)
+    feeder = TaskFeeder(
+        cfg.task_library if cfg.task_library is not None else TASK_LIBRARY,
+        cfg.task_mode,
+        cfg.task_template if cfg.task_template is not None else DEFAULT_SHORT_TASK_TEMPLATE,
+        cfg.max_turns,
+        rng=rng,
+    )
     send_status("starting", base_port=cfg.base_port)
+    last_feedback_raw: object = None
     last_feedback_str: Optional[str] = None
+    # Feedback of the last "step" status sent; repeats are not resent.
+    last_sent_feedback: Optional[str] = None
     try:
         with bench.run(server_debug=cfg.server_debug, fast_api=cfg.fast_api):
             send_status("running")
             while not stop_event.is_set():
                 instruction = feeder.next_instruction(cfg.agent_name, last_feedback_str)
-                start = time.time()
+                start_ns = time.monotonic_ns()
                 try:
                     feedback, detail = bench.step(cfg.agent_name, instruction)
-                    duration = time.time() - start
-                    # normalize feedback for continuity
-                    if isinstance(feedback, str):
-                        last_feedback_str = feedback.strip().replace("\n", " ")
-                    else:
-                        last_feedback_str = str(feedback)
-                    if last_feedback_str and len(last_feedback_str) > 400:
-                        last_feedback_str = last_feedback_str[:400] + "..."
+                    duration_ns = time.monotonic_ns() - start_ns
+                    duration = duration_ns / 1e9
+                    # normalize feedback for continuity; a stalled agent often
+                    # repeats the same feedback, so skip the work when unchanged
+                    if last_feedback_str is None or feedback != last_feedback_raw:
+                        last_feedback_raw = feedback
+                        last_feedback_str = _normalize_feedback(feedback)
 
                     print(f"[{cfg.agent_name}] step done in {duration:.2f}s -> {(feedback or 'UNKNOWN')}")
-                    send_status(
-                        "step",
-                        duration=duration,
-                        feedback=feedback or "UNKNOWN",
-                        detail=detail,
-                    )
+                    # Only ship what the GUI renders; `detail` carries the full
+                    # prompt and action list and would be pickled on every step.
+                    step_feedback = feedback or "UNKNOWN"
+                    if step_feedback != last_sent_feedback:
+                        last_sent_feedback = step_feedback
+                        send_status(
+                            "step",
+                            duration_ns=duration_ns,
+                            feedback=step_feedback,
+                            actions=len((detail or {}).get("action_list") or []),
+                        )
                     # ML log
                     log_step({
                         "agent": cfg.agent_name,
@@ -220,28 +364,101 @@ def worker_entry(cfg: WorkerConfig, stop_event: mp.Event, status_queue: Optional
                     })
                 except Exception as exc:
                     send_status("error", message=str(exc))
-                    time.sleep(max(cfg.step_delay, 1.0))
+                    # the GUI now shows the error, so the next step must be sent
+                    last_sent_feedback = None
+                    # wait() returns early on shutdown instead of sleeping it out
+                    if stop_event.wait(max(cfg.step_delay, 1.0)):
+                        break
                     continue
-                time.sleep(cfg.step_delay)
+                if stop_event.wait(cfg.step_delay):
+                    break
     except KeyboardInterrupt:
         pass
     finally:
+        # A late SIGTERM must not cut the cleanup short.
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
         bench.stop()
+        # multiprocessing exits workers via os._exit, which skips atexit hooks
+        flush_log()
         send_status("stopped")
 
 
+# Heavy modules every worker imports. Under forkserver they are imported once
+# in the server process and inherited copy-on-write by each forked worker.
+WORKER_PRELOAD_MODULES = [
+    "env.env",
+    "env.minecraft_client",
+    "ml_models.logger",
+    "controller.multiprocess_core",
+]
+
+
+def worker_context():
+    """
+    Multiprocessing context used for worker processes.
+
+    Prefers forkserver (POSIX) so the LangChain/OpenAI import stack is paid
+    once rather than per worker; falls back to spawn where it is unavailable.
+    Create any queues or events shared with workers from this context.
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+        return ctx
+    return mp.get_context("spawn")
+
+
 def spawn_workers(
     configs: Sequence[WorkerConfig],
-    status_queue: Optional[mp.Queue] = None,
+    status_bus: Optional[StatusBus] = None,
 ) -> tuple[List[mp.Process], mp.Event]:
     if not configs:
         raise ValueError("No worker configs provided.")
-    ctx = mp.get_context("spawn")
+    ctx = worker_context()
     stop_event = ctx.Event()
     processes: List[mp.Process] = []
     for cfg in configs:
-        proc = ctx.Process(target=worker_entry, args=(cfg, stop_event, status_queue), daemon=False)
+        status_conn = status_bus.new_sender() if status_bus is not None else None
+        proc = ctx.Process(target=worker_entry, args=(cfg, stop_event, status_conn), daemon=False)
         proc.start()
+        if status_conn is not None:
+            # The child holds its own copy; closing ours lets the bus see EOF
+            # once the worker exits.
+            status_conn.close()
         processes.append(proc)
     return processes, stop_event
 
+
+def _wait_for_exit(processes: Sequence[mp.Process], timeout: float) -> None:
+    # Wait on every sentinel at once, so the total wait is bounded by timeout.
+    deadline = time.monotonic() + timeout
+    sentinels = [p.sentinel for p in processes if p.is_alive()]
+    while sentinels:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        for ready in wait(sentinels, timeout=remaining):
+            sentinels.remove(ready)
+
+
+def join_workers(processes: Sequence[mp.Process], timeout: float = 5.0, grace: float = 3.0) -> None:
+    """
+    Wait up to ``timeout`` seconds in total for all workers to exit, then
+    terminate any that are still running. Workers treat SIGTERM as an
+    interrupt and run their cleanup (bench.stop(), log flush, "stopped"
+    status); any still alive ``grace`` seconds later is killed outright, so
+    the whole call is bounded by about ``timeout + grace`` however many
+    workers there are.
+    """
+    _wait_for_exit(processes, timeout)
+    stragglers = [p for p in processes if p.is_alive()]
+    for p in stragglers:
+        print(f"[WARN] Worker {p.name} did not stop within {timeout:.0f}s; terminating.")
+        p.terminate()
+    _wait_for_exit(stragglers, grace)
+    for p in stragglers:
+        if p.is_alive():
+            print(f"[WARN] Worker {p.name} hung during cleanup; killing.")
+            p.kill()
+    for p in stragglers:
+        p.join()
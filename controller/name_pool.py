@@ -3,7 +3,12 @@ from __future__ import annotations
 import json
 import random
 from pathlib import Path
-from typing import List, Set
+from typing import List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
 
 
 class JsonNamePool:
@@ -11,34 +16,44 @@ class JsonNamePool:
     Simple pool of usernames loaded from a JSON file.
 
     JSON file format: ["kimblue373", "pumpkin_s0up", ...]
+
+    Names are shuffled once at load time and handed out by popping from the
+    tail, so each draw is O(1) and uniqueness needs no bookkeeping.
     """
 
-    def __init__(self, json_path: str):
+    def __init__(self, json_path: str, rng: Optional[random.Random] = None):
         self.json_path = Path(json_path)
+        self._rng = rng or random.Random()
         if not self.json_path.exists():
             raise FileNotFoundError(f"Usernames file not found: {self.json_path}")
         self._names: List[str] = []
-        self._used: Set[str] = set()
         self._load()
 
     def _load(self) -> None:
-        with self.json_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        raw = self.json_path.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         if not isinstance(data, list):
             raise ValueError(f"Expected a list of usernames in {self.json_path}")
-        self._names = [str(n) for n in data if n]
+        # dict.fromkeys drops duplicate names; order does not matter, the list is shuffled next.
+        self._names = list(dict.fromkeys(str(n) for n in data if n))
+        self._rng.shuffle(self._names)
+
+    def _exhausted(self) -> RuntimeError:
+        return RuntimeError(
+            f"No more unique usernames available in {self.json_path}. "
+            "Please expand usernames.json or reduce agent count."
+        )
 
     def next(self) -> str:
-        available = [n for n in self._names if n not in self._used]
-        if not available:
-            raise RuntimeError(
-                f"No more unique usernames available in {self.json_path}. "
-                "Please expand usernames.json or reduce agent count."
-            )
-        name = random.choice(available)
-        self._used.add(name)
-        return name
+        if not self._names:
+            raise self._exhausted()
+        return self._names.pop()
 
     def next_many(self, count: int) -> List[str]:
-        return [self.next() for _ in range(count)]
-
+        if count <= 0:
+            return []
+        if count > len(self._names):
+            raise self._exhausted()
+        names = self._names[-count:]
+        del self._names[-count:]
+        return names
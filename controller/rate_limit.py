@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+
+class TokenBucket:
+    """
+    Per-minute request and token budget shared by every thread that calls the
+    OpenAI API, refilled continuously (the OpenAI cookbook's parallel-processor
+    scheme). acquire() blocks until the call fits, so requests are spread out
+    ahead of time instead of bouncing off 429s and backing off.
+
+    Either limit may be None to leave that dimension unbounded.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.rpm = float(rpm) if rpm else None
+        self.tpm = float(tpm) if tpm else None
+        self._requests = self.rpm or 0.0
+        self._tokens = self.tpm or 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _wait_locked(self, tokens: float) -> float:
+        """
+        Seconds until both buckets can cover one request of ``tokens``; 0 if they can now.
+        """
+        wait = 0.0
+        if self.rpm and self._requests < 1.0:
+            wait = (1.0 - self._requests) * 60.0 / self.rpm
+        if self.tpm and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    def available(self) -> float:
+        """
+        Fraction of the tighter budget left right now (1.0 when unlimited).
+        """
+        with self._lock:
+            self._refill_locked()
+            shares = []
+            if self.rpm:
+                shares.append(self._requests / self.rpm)
+            if self.tpm:
+                shares.append(self._tokens / self.tpm)
+            return min(shares) if shares else 1.0
+
+    def acquire(self, tokens: float = 0.0) -> None:
+        if not self.rpm and not self.tpm:
+            return
+        if self.tpm:
+            # a single call larger than the whole budget would otherwise wait forever
+            tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                self._refill_locked()
+                wait = self._wait_locked(tokens)
+                if wait == 0.0:
+                    if self.rpm:
+                        self._requests -= 1.0
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+            time.sleep(wait)
+
+
+class KeyPool:
+    """
+    API keys with one TokenBucket each. pick() hands out the key with the most
+    budget left; ties (e.g. no limits configured) rotate round-robin so every
+    key carries a share of the load.
+    """
+
+    def __init__(self, keys: Iterable[str], rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.keys = list(dict.fromkeys(keys))
+        if not self.keys:
+            raise ValueError("KeyPool needs at least one API key.")
+        self._buckets = {key: TokenBucket(rpm, tpm) for key in self.keys}
+        self._turn = itertools.count()
+
+    def bucket(self, key: Optional[str]) -> Optional[TokenBucket]:
+        return self._buckets.get(key)
+
+    def pick(self) -> str:
+        start = next(self._turn) % len(self.keys)
+        order = self.keys[start:] + self.keys[:start]
+        # max() keeps the first of equal scores, so the rotation breaks ties
+        return max(order, key=lambda key: self._buckets[key].available())
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """
+    Rough token cost of a chat completions request: ~4 characters per prompt
+    token plus the completion budget, as the cookbook estimates it.
+    """
+    chars = 0
+    for message in request.get("messages") or ():
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+    completion = (request.get("max_tokens") or 0) * (request.get("n") or 1)
+    return chars // 4 + completion
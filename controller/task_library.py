@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import itertools
+import math
 import random
-from typing import Dict, List
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Tuple
 
 __all__ = [
     "BASE_USERNAME_STEMS",
     "UsernameGenerator",
+    "TaskSpec",
     "TASK_LIBRARY",
     "load_task_library",
 ]
@@ -29,31 +33,61 @@ BASE_USERNAME_STEMS: List[str] = [
 class UsernameGenerator:
     """
     Generates random, never-reused usernames based on a configurable base list.
+
+    Names are drawn by walking a random affine permutation of the
+    ``base x suffix`` space, so each call is O(1) and never has to retry on a
+    collision with a name it already produced.
     """
 
-    def __init__(self, base_names: List[str] | None = None):
+    suffix_space = 100_000
+
+    def __init__(self, base_names: List[str] | None = None, rng: random.Random | None = None):
         self.base_names = list(base_names or BASE_USERNAME_STEMS)
+        self._rng = rng or random.Random()
+        # Only names marked externally need tracking; the permutation itself
+        # never yields the same candidate twice.
         self._used: set[str] = set()
+        self._iter: Iterator[str] | None = None
 
     def mark_used(self, names: List[str]) -> None:
         for n in names:
             self._used.add(n)
 
+    def _enumerate(self) -> Iterator[str]:
+        space = len(self.base_names) * self.suffix_space
+        step = self._rng.randrange(1, space)
+        while math.gcd(step, space) != 1:
+            step = self._rng.randrange(1, space)
+        offset = self._rng.randrange(space)
+        for i in range(space):
+            base, suffix = divmod((offset + i * step) % space, self.suffix_space)
+            yield f"{self.base_names[base]}_{suffix}"
+
+    def _candidates(self) -> Iterator[str]:
+        if self._iter is None:
+            if not self.base_names:
+                raise RuntimeError("Unable to generate a new unique username.")
+            self._iter = self._enumerate()
+        return (c for c in self._iter if c not in self._used)
+
     def generate_one(self) -> str:
-        for _ in range(100_000):
-            base = random.choice(self.base_names)
-            suffix = random.randint(0, 99_999)
-            candidate = f"{base}_{suffix}"
-            if candidate not in self._used:
-                self._used.add(candidate)
-                return candidate
+        for candidate in self._candidates():
+            return candidate
         raise RuntimeError("Unable to generate a new unique username.")
 
     def generate_many(self, count: int) -> List[str]:
-        return [self.generate_one() for _ in range(count)]
+        names = list(itertools.islice(self._candidates(), max(0, count)))
+        if len(names) < count:
+            raise RuntimeError("Unable to generate a new unique username.")
+        return names
+
 
+class TaskSpec(NamedTuple):
+    id: str
+    description: str
 
-TASK_LIBRARY: List[Dict[str, str]] = [
+
+_RAW_TASK_LIBRARY: List[Dict[str, str]] = [
     {
         "id": "gather_wood_and_store",
         "description": (
@@ -154,10 +188,17 @@ TASK_LIBRARY: List[Dict[str, str]] = [
 ]
 
 
+# Immutable, interned task specs: workers and feeders hold references to these
+# instead of copying the dicts.
+TASK_LIBRARY: Tuple[TaskSpec, ...] = tuple(
+    TaskSpec(sys.intern(task["id"]), sys.intern(task["description"]))
+    for task in _RAW_TASK_LIBRARY
+)
+
+
 def load_task_library() -> List[Dict[str, str]]:
     """
     Return a list of dictionaries (id + description) for downstream consumers
     that still expect the previous structure.
     """
-    return [task.copy() for task in TASK_LIBRARY]
-
+    return [dict(spec._asdict()) for spec in TASK_LIBRARY]
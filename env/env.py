@@ -1,5 +1,6 @@
 from env.minecraft_client import Agent
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import traceback
 import names
 import subprocess
@@ -181,7 +182,12 @@ class VillagerBench:
     def get_init_state(self) -> [dict]:
         assert self.running or self._virtual_debug, "env not running, please '.launch()' first"
         if self.running:
-            return [self.agent_status(agent.name) for agent in self.agent_pool]
+            agent_names = [agent.name for agent in self.agent_pool]
+            if len(agent_names) <= 1:
+                return [self.agent_status(name) for name in agent_names]
+            # each agent has its own bridge, so the status round-trips can overlap
+            with ThreadPoolExecutor(max_workers=len(agent_names)) as pool:
+                return list(pool.map(self.agent_status, agent_names))
         else:
             return [VillagerBench.virtual_env(agent.name) for agent in self.agent_pool]
 
@@ -257,9 +263,8 @@ class VillagerBench:
         return {"message": "all agents are online", "status": True}
 
     def agent_status(self, agent_name: str):  # 返回一个dict
-        for agent in self.agent_pool:
-            if agent.name == agent_name:
-               return Agent.get_environment_info_dict(agent_name)
+        if agent_name in self.agent_map:
+            return Agent.get_environment_info_dict(agent_name)
         return {"message": f"agent {agent_name} not found", "status": False}
 
     def agent_register(self, agent_tool=[], agent_number: int = 1, name_list: [str] = []):
@@ -12,6 +12,7 @@ from langchain_core.outputs import LLMResult
 import json
 import requests
 import subprocess
+import importlib.util
 import logging
 import datetime
 import threading
@@ -23,67 +24,42 @@ env = os.environ.copy()
 env["PYTHONIOENCODING"] = "utf-8"
 
 # --- OpenAI compatibility patch: strip `encoding` kwarg and time calls ---
-try:
-    from openai import resources as _openai_resources  # type: ignore[attr-defined]
-
-    try:
-        # openai 1.x: resources.chat.completions.create
-        _chat_completions = getattr(_openai_resources, "chat").completions  # type: ignore[attr-defined]
-        _orig_chat_create = _chat_completions.create
-
-        def _patched_chat_create(self, *args, **kwargs):
-            kwargs.pop("encoding", None)
-            start = time.time()
-            try:
-                return _orig_chat_create(self, *args, **kwargs)
-            finally:
-                dur = time.time() - start
-                print(f"[LLM] chat.completions.create took {dur:.3f}s")
-
-        _chat_completions.create = _patched_chat_create  # type: ignore[assignment]
-        print("[INFO] Patched openai.resources.chat.completions.create to ignore 'encoding' kwarg.")
-    except Exception:
-        # Fallback for older import paths
-        from openai.resources.chat.completions import Completions as _Completions  # type: ignore
-
-        _orig_create = _Completions.create
-
-        def _patched_create(self, *args, **kwargs):
-            kwargs.pop("encoding", None)
-            start = time.time()
-            try:
-                return _orig_create(self, *args, **kwargs)
-            finally:
-                dur = time.time() - start
-                print(f"[LLM] Completions.create took {dur:.3f}s")
-
-        _Completions.create = _patched_create  # type: ignore[assignment]
-        print("[INFO] Patched openai.resources.chat.completions.Completions.create to ignore 'encoding' kwarg.")
+def _timed_create(orig_create, label):
+    @wraps(orig_create)
+    def _patched_create(*args, encoding=None, **kwargs):
+        start = time.time()
+        try:
+            return orig_create(*args, **kwargs)
+        finally:
+            print(f"[LLM] {label} took {time.time() - start:.3f}s")
 
-    # Also patch legacy ChatCompletion for safety
-    try:
-        import openai as _openai_mod  # type: ignore
+    return _patched_create
 
-        if hasattr(_openai_mod, "ChatCompletion"):
-            _orig_legacy_create = _openai_mod.ChatCompletion.create
 
-            def _patched_legacy_create(*args, **kwargs):
-                kwargs.pop("encoding", None)
-                start = time.time()
-                try:
-                    return _orig_legacy_create(*args, **kwargs)
-                finally:
-                    dur = time.time() - start
-                    print(f"[LLM] ChatCompletion.create took {dur:.3f}s")
+# Probe once and patch only the API surface the installed version has.
+if importlib.util.find_spec("openai") is not None:
+    import openai as _openai_mod
 
-            _openai_mod.ChatCompletion.create = _patched_legacy_create  # type: ignore[assignment]
-            print("[INFO] Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
-    except Exception:
-        pass
+    _openai_version = tuple(int(x) for x in _openai_mod.__version__.split(".")[:2] if x.isdigit())
+    if _openai_version >= (1, 0):
+        from openai.resources.chat.completions import Completions as _Completions
 
-except Exception:
-    # If openai isn't available or layout is different, fail silently.
-    pass
+        _Completions.create = _timed_create(_Completions.create, "Completions.create")
+        print("[INFO] Patched openai.resources.chat.completions.Completions.create to ignore 'encoding' kwarg.")
+    else:
+        # The classmethod comes back already bound; staticmethod keeps instance calls working.
+        _openai_mod.ChatCompletion.create = staticmethod(_timed_create(_openai_mod.ChatCompletion.create, "ChatCompletion.create"))
+        print("[INFO] Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
+
+# One keep-alive session for every call to the Mineflayer bridges, so tool calls
+# reuse pooled TCP connections instead of connecting per request. Each agent's
+# bridge is its own host:port pool; pool_connections is how many of those pools are
+# kept, so it must cover every agent or the least recently used agent's connections
+# are dropped and re-opened. Pools are created lazily, so a high ceiling is free.
+# No retries: bridge POSTs move the bot and must not be replayed.
+BRIDGE_POOL_HOSTS = 256
+bridge_session = requests.Session()
+bridge_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=BRIDGE_POOL_HOSTS, pool_maxsize=32, pool_block=False))
 
 def filter_emoji(text: str) -> str:
     ret_str = []
@@ -125,7 +101,7 @@ def timeit(func):
             "emotion": emotion,
             "murmur": murmur,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         ###
         kwargs_in = kwargs.copy()
         if "emotion" in kwargs:
@@ -244,6 +220,41 @@ class Agent():
     name2port = {}
     agent_process = {}
     url_prefix = {}
+    # Extra LangChain callback handlers attached to every agent run (e.g. a REPL's
+    # live progress printer). With stream_tokens, cached ChatOpenAI clients stream
+    # and report each token through on_llm_new_token as it arrives.
+    extra_callbacks = []
+    stream_tokens = False
+    # Sent as OpenAI's prompt_cache_key so requests sharing a static prompt prefix
+    # land on the same cache; None leaves the request body untouched.
+    prompt_cache_key = None
+    # Optional controller.rate_limit.KeyPool; when set, OpenAI-backed runs use its
+    # least-loaded key instead of a random entry of api_key_list.
+    key_pool = None
+    # (model, base_url, api_key, streaming, prompt_cache_key) -> ChatOpenAI, so repeated
+    # steps reuse the client's HTTP connection pool instead of paying a new TLS handshake.
+    _chat_llm_cache = {}
+
+    @classmethod
+    def _pick_api_key(cls):
+        if cls.key_pool is not None:
+            return cls.key_pool.pick()
+        return random.choice(cls.api_key_list)
+
+    @classmethod
+    def _chat_openai(cls, model, api_key):
+        cache_key = (model, cls.base_url, api_key, cls.stream_tokens, cls.prompt_cache_key)
+        llm = cls._chat_llm_cache.get(cache_key)
+        if llm is None:
+            from langchain.chat_models import ChatOpenAI
+            # No model_kwargs={"encoding": ...} here: ChatOpenAI forwards model_kwargs
+            # straight into Completions.create, which has no such parameter.
+            model_kwargs = {}
+            if cls.prompt_cache_key:
+                model_kwargs["extra_body"] = {"prompt_cache_key": cls.prompt_cache_key}
+            llm = ChatOpenAI(model=model, temperature=0,  max_tokens=256, openai_api_key=api_key, base_url=cls.base_url, streaming=cls.stream_tokens, model_kwargs=model_kwargs)
+            cls._chat_llm_cache[cache_key] = llm
+        return llm
 
     @classmethod
     def configure_llm(cls, *, model=None, base_url=None, api_keys=None, max_iterations=None, max_execution_time=None):
@@ -373,6 +384,7 @@ class Agent():
             Agent.sleep, Agent.wake, Agent.talkTo, Agent.waitForFeedback, Agent.startFishing, Agent.ToggleAction, 
             Agent.read, Agent.mountEntity, Agent.dismountEntity
         ]
+        self.all_tools_by_name = {tool.name: tool for tool in self.all_tools}
         # self.all_tools = [
         #     Agent.scanNearbyEntities, Agent.navigateTo, Agent.attackTarget,
         #     Agent.navigateToBuilding, Agent.navigateToAnimal, Agent.navigateToPlayer,
@@ -478,26 +490,26 @@ class Agent():
             "id": structure_idx,
             "center_pos": center_pos,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     def env(self, prompt):
         """Get the Environment Information"""
         url = Agent.get_url_prefix()[self.name] + "/post_environment"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return str(response.json())
     
     def get_environment_info_dict(player_name: str):
         """Get the Environment Information, return string contains time of day, weather"""
         url = Agent.get_url_prefix()[player_name] + "/post_environment_dict"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
     
     def ping(player_name: str):
         """Ping the Server"""
         try:
             url = Agent.get_url_prefix()[player_name] + "/post_ping"
-            response = requests.get(url)
+            response = bridge_session.get(url)
             return response.json()
         except Exception as e:
             return {'message': 'Exception', 'status': False}
@@ -552,7 +564,7 @@ class Agent():
             "top_y": top_y,
             "top_z": top_z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     @tool
@@ -565,7 +577,7 @@ class Agent():
             "top_y": top_y,
             "top_z": top_z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -581,7 +593,7 @@ class Agent():
             "y_2": y_2,
             "z_2": z_2,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     @tool
@@ -597,7 +609,7 @@ class Agent():
             "y_2": y_2,
             "z_2": z_2,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
 
@@ -611,7 +623,7 @@ class Agent():
             "distance": radius,
             "count": item_num,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -625,7 +637,7 @@ class Agent():
             "target_name": target_player_name,
             "item_count": item_count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -636,7 +648,7 @@ class Agent():
         data = {
             "name": target_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -647,7 +659,7 @@ class Agent():
         data = {
             "name": building_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -658,7 +670,7 @@ class Agent():
         data = {
             "name": animal_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -671,7 +683,7 @@ class Agent():
             "y": y,
             "z": z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     def _navigateTo(player_name: str, x: int, y: int, z: int):
@@ -682,7 +694,7 @@ class Agent():
             "y": y,
             "z": z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -694,7 +706,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "entity_name": entity_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     @tool
@@ -708,7 +720,7 @@ class Agent():
             "y": y,
             "z": z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -716,7 +728,7 @@ class Agent():
     def sleep(player_name: str, emotion: list, murmur: str):
         """Go to Sleep"""
         url = Agent.get_url_prefix()[player_name] + "/post_sleep"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -724,7 +736,7 @@ class Agent():
     def wake(player_name: str, emotion: list, murmur: str):
         """Wake Up"""
         url = Agent.get_url_prefix()[player_name] + "/post_wake"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -737,7 +749,7 @@ class Agent():
             "y": y,
             "z": z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -752,7 +764,7 @@ class Agent():
             "z": z,
             "facing": facing,
         }            
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     @tool
     @timeit
@@ -762,7 +774,7 @@ class Agent():
         data = {
             "name": target_name.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -774,7 +786,7 @@ class Agent():
             "slot": slot,
             "item_name": item_name.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -786,7 +798,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "count": count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -794,7 +806,7 @@ class Agent():
     def get_environment_info(player_name: str, emotion: list, murmur: str):
         """Get the Environment Information, return string contains time of day, weather"""
         url = Agent.get_url_prefix()[player_name] + "/post_environment"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -805,7 +817,7 @@ class Agent():
         data = {
             "name": target_name.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -818,7 +830,7 @@ class Agent():
             "from_name": from_name.lower().replace(" ", "_"),
             "item_count": item_count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -831,7 +843,7 @@ class Agent():
             "to_name": to_name.lower().replace(" ", "_"),
             "item_count": item_count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -844,7 +856,7 @@ class Agent():
             "item_count": item_count,
             "fuel_item_name": fuel_item_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -856,7 +868,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "count": count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -868,7 +880,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "count": count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -881,7 +893,7 @@ class Agent():
             "with_name": with_name,
             "count": count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -893,7 +905,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "material": material.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -904,7 +916,7 @@ class Agent():
         data = {
             "item_name": item_name.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -916,7 +928,7 @@ class Agent():
             "item_name": item_name.lower().replace(" ", "_"),
             "count": count,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -928,7 +940,7 @@ class Agent():
             "slot": slot,
             "item_name": item_name.lower().replace(" ", "_"),
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     @tool
@@ -943,7 +955,7 @@ class Agent():
         data = {
             "item_name": container_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
 
@@ -961,7 +973,7 @@ class Agent():
         data = {
             "item_name": item_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -976,7 +988,7 @@ class Agent():
         data = {
             "item_name": item_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -992,7 +1004,7 @@ class Agent():
             "y": y,
             "z": z,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1003,7 +1015,7 @@ class Agent():
         data = {
             "entity_name": entity_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1011,7 +1023,7 @@ class Agent():
     def dismountEntity(player_name: str, emotion: list, murmur: str):
         """Dismount the Entity"""
         url = Agent.get_url_prefix()[player_name] + "/post_dismount"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1022,7 +1034,7 @@ class Agent():
         data = {
             "entity_name": entity_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1030,7 +1042,7 @@ class Agent():
     def disrideEntity(player_name: str, emotion: list, murmur: str):
         """Disride the Entity"""
         url = Agent.get_url_prefix()[player_name] + "/post_disride"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1050,7 +1062,7 @@ class Agent():
             "message": message,
             "emotion": emotion,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
     
     @tool
@@ -1062,7 +1074,7 @@ class Agent():
             "entity_name": entity_name,
             "seconds": seconds,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1074,7 +1086,7 @@ class Agent():
             "action_name": action_name,
             "seconds": seconds,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1085,7 +1097,7 @@ class Agent():
         data = {
             "name": name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     def _lookAt(player_name: str, name: str):
@@ -1094,7 +1106,7 @@ class Agent():
         data = {
             "name": name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1105,7 +1117,7 @@ class Agent():
         data = {
             "fish_name": fish_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1113,7 +1125,7 @@ class Agent():
     def stopFishing(player_name: str, emotion: list, murmur: str):
         """Stop Fishing"""
         url = Agent.get_url_prefix()[player_name] + "/post_stop_fishing"
-        response = requests.post(url, headers=Agent.headers)
+        response = bridge_session.post(url, headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1124,7 +1136,7 @@ class Agent():
         data = {
             "name": item_name,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1136,7 +1148,7 @@ class Agent():
             "name": item_name,
             "page": page,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     @tool
@@ -1148,7 +1160,7 @@ class Agent():
             "name": item_name,
             "content": content,
         }
-        response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+        response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
         return response.json()
 
     def update_history(self, response):
@@ -1188,18 +1200,15 @@ class Agent():
         for act, obs in zip(actions, observations):
             instruction += f"\n{act['log']}\n{obs}"
         
-        recommended_tools = []
-        for action in recommended_actions:
-            for tool in self.all_tools:
-                if tool.name == action:
-                    recommended_tools.append(tool)
+        recommended_tools = [self.all_tools_by_name[action] for action in recommended_actions if action in self.all_tools_by_name]
         
         if recommended_tools == []:
             recommended_tools = self.all_tools if len(tools) == 0 else tools
         llmhandler = LLMHandler()
 
+        # Tools keep their registration order so the rendered tool block, and
+        # with it the prompt prefix, is identical on every call and cacheable.
         while max_try_turn > 0:
-            random.shuffle(self.tools)
             agent = initialize_agent(
                 tools=recommended_tools,
                 llm=self.llm,
@@ -1208,7 +1217,7 @@ class Agent():
                 return_intermediate_steps=True,
                 max_execution_time=120,  # seconds
                 max_iterations=1,  # 决定了最大的迭代次数
-                callback_manager=BaseCallbackManager(handlers=[llmhandler]),
+                callback_manager=BaseCallbackManager(handlers=[llmhandler, *Agent.extra_callbacks]),
             )
             agent.handle_parsing_errors = True
             response = None
@@ -1270,8 +1279,7 @@ class Agent():
             from langchain.llms import OpenAI
             self.llm = OpenAI(model=self.model, temperature=0, max_tokens=256, openai_api_key=random.choice(Agent.api_key_list), base_url=Agent.base_url)
         elif "gpt" in self.model or "NAS" in self.model or "llama" in self.model:
-            from langchain.chat_models import ChatOpenAI
-            self.llm = ChatOpenAI(model=self.model, temperature=0,  max_tokens=256, openai_api_key=random.choice(Agent.api_key_list), base_url=Agent.base_url, model_kwargs={"encoding": "utf-8"})
+            self.llm = Agent._chat_openai(self.model, Agent._pick_api_key())
         elif "gemini" in self.model:
             from langchain_google_genai import ChatGoogleGenerativeAI
             self.llm = ChatGoogleGenerativeAI(model=self.model, temperature=0, google_api_key=random.choice(Agent.api_key_list))
@@ -1279,16 +1287,14 @@ class Agent():
             from zhipu import ChatZhipuAI
             self.llm = ChatZhipuAI(model_name=self.model, temperature=0.01, api_key=random.choice(Agent.api_key_list))
         elif "deepseek" in self.model:
-            from langchain.chat_models import ChatOpenAI
-            self.llm = ChatOpenAI(model=self.model, temperature=0,  max_tokens=256, openai_api_key=random.choice(Agent.api_key_list), base_url=Agent.base_url, model_kwargs={"encoding": "utf-8"})
+            self.llm = Agent._chat_openai(self.model, Agent._pick_api_key())
         elif "default" in self.model:
-            from langchain.chat_models import ChatOpenAI
-            self.llm = ChatOpenAI(model=self.model, temperature=0,  max_tokens=256, openai_api_key=random.choice(Agent.api_key_list), base_url=Agent.base_url, model_kwargs={"encoding": "utf-8"})
+            self.llm = Agent._chat_openai(self.model, Agent._pick_api_key())
         else:
             raise NotImplementedError(f"Model {self.model} not implemented.")
         # 这个地方是定义的agent的类型，初始化位置的agent没有被使用
+        # Tools keep their registration order; see step().
         while max_try_turn > 0:
-            random.shuffle(self.tools)
             llmhandler = LLMHandler()
             agent = initialize_agent(
                 tools=self.tools if len(tools) == 0 else tools,
@@ -1298,7 +1304,7 @@ class Agent():
                 return_intermediate_steps=True,
                 max_execution_time=120,  # seconds
                 max_iterations=max_iterations,  # 决定了最大的迭代次数
-                callback_manager=BaseCallbackManager(handlers=[llmhandler]),
+                callback_manager=BaseCallbackManager(handlers=[llmhandler, *Agent.extra_callbacks]),
             )
             agent.handle_parsing_errors = True
             response = None
@@ -1386,12 +1392,12 @@ class Agent():
             "msg": msg,
         }
         if async_tag:
-            threading.Thread(target=requests.post, args=(url,),
+            threading.Thread(target=bridge_session.post, args=(url,),
                              kwargs={"data": json.dumps(data), "headers": Agent.headers}).start()
             return {}
         else:
             time.sleep(.05)
-            response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+            response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
             return response.json()
 
 
@@ -1415,7 +1421,7 @@ if __name__ == "__main__":
         "item_name": "saddle",
         "entity_name": "horse",
     }
-    response = requests.post(url, data=json.dumps(data), headers=Agent.headers)
+    response = bridge_session.post(url, data=json.dumps(data), headers=Agent.headers)
     print(response.json())
     print(time.time() - start_time)
     # # print(Agent.ping("Alice"))
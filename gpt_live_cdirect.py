@@ -13,54 +13,11 @@ import sys
 import time
 
 # ---------------------------------------------------------------------
-# 0. Patch OpenAI ChatCompletions to ignore 'encoding' kwarg
+# 0/1. Patch OpenAI 'encoding' kwarg and requests.Response.json (once per interpreter)
 # ---------------------------------------------------------------------
-try:
-    from openai.resources.chat.completions import Completions as _ChatCompletions
-    _orig_chat_create = _ChatCompletions.create
-
-    def _patched_chat_create(self, *args, **kwargs):
-        kwargs.pop("encoding", None)
-        return _orig_chat_create(self, *args, **kwargs)
-
-    _ChatCompletions.create = _patched_chat_create
-    print("[INFO] Patched openai.resources.chat.completions.Completions.create to ignore 'encoding' kwarg.")
-except Exception as e:
-    print("[WARN] Could not patch Completions.create:", e)
-
-# Also patch legacy ChatCompletion.create for safety
-try:
-    import openai as _openai_mod
-    if hasattr(_openai_mod, "ChatCompletion"):
-        _orig_legacy_create = _openai_mod.ChatCompletion.create
-
-        def _patched_legacy_create(*args, **kwargs):
-            kwargs.pop("encoding", None)
-            return _orig_legacy_create(*args, **kwargs)
-
-        _openai_mod.ChatCompletion.create = _patched_legacy_create
-        print("[INFO] Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
-except Exception as e:
-    print("[WARN] Could not patch openai.ChatCompletion.create:", e)
+from controller import _patches
 
-# ---------------------------------------------------------------------
-# 1. Patch requests.Response.json to never crash on bad JSON
-# ---------------------------------------------------------------------
-import requests
-from requests.models import Response as _Resp
-
-_orig_response_json = _Resp.json
-
-def _safe_response_json(self, *args, **kwargs):
-    try:
-        return _orig_response_json(self, *args, **kwargs)
-    except Exception as e:
-        text = self.text or ""
-        print(f"[WARN] Response.json failed ({e}); returning stub. Raw (first 200 chars): {text[:200]!r}")
-        return {"message": text, "status": False, "new_events": []}
-
-_Resp.json = _safe_response_json
-print("[INFO] Patched requests.Response.json to return stub on JSON decode error.")
+_patches.apply_all()
 
 # ---------------------------------------------------------------------
 # 2. Imports from this repo
@@ -1,83 +1,44 @@
 # alice_direct_repl_limited.py
 #
-# Live natural-language controller for Alice using env.step (BaseAgent pipeline).
+# Live natural-language controller for Alice (or the agents in MCAGENT_AGENTS) using env.step (BaseAgent pipeline).
 # - Uses the repo's built-in tool-using agent (no TaskManager / GlobalController).
 # - Wraps your instruction in a meta-prompt that limits the number of Actions.
+# - MCAGENT_AGENTS="Alice,Bob" registers several agents; lines like
+#   "@Alice: ...; @Bob: ..." then step them concurrently.
+# - Streams LLM tokens and tool calls while env.step runs instead of only printing the result.
 # - Patches OpenAI 1.x so LangChain's old 'encoding' kwarg doesn't crash.
 # - Patches requests.Response.json so non-JSON replies from the bridge don't blow up.
 
+import functools
 import json
+import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# ---------------------------------------------------------------------
-# 0. Patch OpenAI ChatCompletions to ignore 'encoding' kwarg
-# ---------------------------------------------------------------------
 try:
-    from openai.resources.chat.completions import Completions as _ChatCompletions
-    _orig_chat_create = _ChatCompletions.create
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
 
-    def _patched_chat_create(self, *args, **kwargs):
-        kwargs.pop("encoding", None)
-        return _orig_chat_create(self, *args, **kwargs)
-
-    _ChatCompletions.create = _patched_chat_create
-    print("[INFO] Patched openai.resources.chat.completions.Completions.create to ignore 'encoding' kwarg.")
-except Exception as e:
-    print("[WARN] Could not patch Completions.create:", e)
-
-# Also patch legacy ChatCompletion.create for safety
-try:
-    import openai as _openai_mod
-    if hasattr(_openai_mod, "ChatCompletion"):
-        _orig_legacy_create = _openai_mod.ChatCompletion.create
-
-        def _patched_legacy_create(*args, **kwargs):
-            kwargs.pop("encoding", None)
-            return _orig_legacy_create(*args, **kwargs)
-
-        _openai_mod.ChatCompletion.create = _patched_legacy_create
-        print("[INFO] Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
-except Exception as e:
-    print("[WARN] Could not patch openai.ChatCompletion.create:", e)
-
-# ---------------------------------------------------------------------
-# 1. Patch requests.Response.json to never crash on bad JSON
-# ---------------------------------------------------------------------
-import requests
-from requests.models import Response as _Resp
-
-_orig_response_json = _Resp.json
-
-def _safe_response_json(self, *args, **kwargs):
-    try:
-        return _orig_response_json(self, *args, **kwargs)
-    except Exception as e:
-        text = self.text or ""
-        print(f"[WARN] Response.json failed ({e}); returning stub. Raw (first 200 chars): {text[:200]!r}")
-        return {"message": text, "status": False, "new_events": []}
-
-_Resp.json = _safe_response_json
-print("[INFO] Patched requests.Response.json to return stub on JSON decode error.")
-
-# ---------------------------------------------------------------------
-# 2. Imports from this repo
-# ---------------------------------------------------------------------
-from env.env import VillagerBench, env_type, Agent
-from pipeline.data_manager import DataManager
+# openai, requests, LangChain and env.env (Mineflayer bridge) take seconds to import;
+# they are loaded in the __main__ block only after API_KEY_LIST has been validated.
 
 
+@functools.lru_cache(maxsize=1)
 def load_api_keys():
     """
     Load an API key from API_KEY_LIST in the current working directory.
-    Tries OPENAI first, then AGENT_KEY.
+    Tries OPENAI first, then AGENT_KEY. The file is only read once per process.
     """
     try:
-        with open("API_KEY_LIST", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        raw = Path("API_KEY_LIST").read_bytes()
     except FileNotFoundError:
         print("[ERROR] API_KEY_LIST not found in current directory.")
         sys.exit(1)
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     keys = data.get("OPENAI") or data.get("AGENT_KEY") or []
     if not keys:
@@ -86,11 +47,144 @@ def load_api_keys():
     return keys
 
 
+# Meta-prompt wrapped around every user instruction. Everything before the trailing
+# {user_task} slot is constant, so provider-side prompt caching can reuse it; the
+# agent's name is already prepended by Agent.run.
+WRAPPED_TEMPLATE = """
+You are a Minecraft agent in a live Minecraft world.
+You can only act by calling tools (Actions) such as navigateTo, talkTo, MineBlock, placeBlock, etc.
+
+# Execution rules
+- You must use at least 1 and at most 4 Actions (tool calls) before producing your Final Answer.
+- Do NOT keep repeating the same kind of action (for example, do not call talkTo more than twice).
+- After at most 4 Actions, you MUST output a single 'Final Answer' that:
+    * Briefly explains what you did in the world.
+    * Mentions whether you succeeded or failed at the high-level instruction.
+- Once you output 'Final Answer', STOP. Do not continue acting.
+
+Follow the existing action format and conventions used in your tools.
+
+# High-level instruction
+{user_task}
+"""
+
+# Routes every wrapped-instruction request to the same prompt-cache shard.
+PROMPT_CACHE_KEY = "alice_v1"
+
+# Agents registered with the env (comma-separated MCAGENT_AGENTS); the first one
+# receives lines without an @Name: prefix.
+DEFAULT_AGENT_NAMES = "Alice"
+
+# OpenAI requests-per-minute budget (MCAGENT_RPM); concurrent env.step calls for
+# "@Name:" lines are sized from it so parallel agents stay under quota.
+DEFAULT_RPM = 480
+
+_AGENT_SPLIT_RE = re.compile(r";\s*(?=@\w+:)")
+_AGENT_PREFIX_RE = re.compile(r"@(\w+):\s*(.*)", re.DOTALL)
+
+
+def read_agent_names():
+    """
+    Agent names from MCAGENT_AGENTS, in order and without duplicates.
+    """
+    raw = os.getenv("MCAGENT_AGENTS", DEFAULT_AGENT_NAMES)
+    names = list(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+    bad = [n for n in names if not re.fullmatch(r"\w+", n)]
+    if not names or bad:
+        print(f"[ERROR] MCAGENT_AGENTS must be a comma-separated list of names, got {raw!r}.")
+        sys.exit(1)
+    return names
+
+
+def read_step_workers():
+    """
+    Concurrent env.step calls allowed by MCAGENT_RPM (one per second of budget).
+    """
+    raw = os.getenv("MCAGENT_RPM", str(DEFAULT_RPM))
+    try:
+        rpm = int(raw)
+    except ValueError:
+        rpm = 0
+    if rpm <= 0:
+        print(f"[ERROR] MCAGENT_RPM must be a positive integer, got {raw!r}.")
+        sys.exit(1)
+    return max(1, rpm // 60)
+
+
+def split_agent_instructions(line: str, agent_names):
+    """
+    Split "@Alice: do x; @Bob: do y" into [("Alice", "do x"), ("Bob", "do y")].
+    A line without an @Name: prefix goes to the first of agent_names.
+    Segments for the same agent are merged into one instruction, since an
+    agent can only run one env.step at a time.
+    """
+    if not line.startswith("@"):
+        return [(agent_names[0], line)]
+    by_agent = {}
+    for part in _AGENT_SPLIT_RE.split(line):
+        match = _AGENT_PREFIX_RE.match(part.strip())
+        if match is None or not match.group(2).strip():
+            print(f"[WARN] Ignoring malformed segment: {part!r}")
+            continue
+        by_agent.setdefault(match.group(1), []).append(match.group(2).strip())
+    return [(agent, "; ".join(tasks)) for agent, tasks in by_agent.items()]
+
+
+def make_progress_printer():
+    """
+    Build a LangChain callback handler that prints LLM tokens and tool calls as the
+    agent produces them, so progress shows up before env.step returns.
+    """
+    from langchain_core.callbacks.base import BaseCallbackHandler
+
+    class StepProgressPrinter(BaseCallbackHandler):
+        def on_llm_new_token(self, token: str, **kwargs) -> None:
+            print(token, end="", flush=True)
+
+        def on_agent_action(self, action, **kwargs) -> None:
+            print(f"\n[STEP] {action.tool}({action.tool_input})", flush=True)
+
+        def on_tool_end(self, output, **kwargs) -> None:
+            print(f"[STEP] -> {str(output)[:200]}", flush=True)
+
+    return StepProgressPrinter()
+
+
+def timed_step(env, agent: str, user_task: str):
+    """
+    Run one wrapped env.step for `agent`; returns (agent, feedback, detail, seconds, error).
+    """
+    wrapped_instruction = WRAPPED_TEMPLATE.format(user_task=user_task)
+    start_t = time.time()
+    try:
+        feedback, detail = env.step(agent, wrapped_instruction)
+    except Exception as e:
+        return agent, None, None, time.time() - start_t, e
+    return agent, feedback, detail, time.time() - start_t, None
+
+
 if __name__ == "__main__":
+    api_key_list = load_api_keys()
+    agent_names = read_agent_names()
+    # Only needed when several agents can be stepped from one line.
+    step_pool = ThreadPoolExecutor(max_workers=read_step_workers()) if len(agent_names) > 1 else None
+
+    # -----------------------------------------------------------------
+    # 0/1. Patch OpenAI 'encoding' kwarg and requests.Response.json (once per interpreter)
+    # -----------------------------------------------------------------
+    from controller import _patches
+
+    _patches.apply_all()
+
+    # -----------------------------------------------------------------
+    # 2. Imports from this repo
+    # -----------------------------------------------------------------
+    from env.env import VillagerBench, env_type, Agent
+    from pipeline.data_manager import DataManager
+
     # -----------------------------------------------------------------
     # 3. Configure LLM for BaseAgent pipeline
     # -----------------------------------------------------------------
-    api_key_list = load_api_keys()
 
     # Use official OpenAI endpoint & model; change model_name if you prefer
     base_url = "https://api.openai.com/v1"
@@ -99,6 +193,9 @@ if __name__ == "__main__":
     Agent.model = model_name
     Agent.base_url = base_url
     Agent.api_key_list = api_key_list
+    Agent.stream_tokens = True
+    Agent.prompt_cache_key = PROMPT_CACHE_KEY
+    Agent.extra_callbacks = [make_progress_printer()]
 
     # -----------------------------------------------------------------
     # 4. Create environment bound to YOUR Minecraft server
@@ -113,7 +210,7 @@ if __name__ == "__main__":
     )
 
     # -----------------------------------------------------------------
-    # 5. Register Alice with a rich toolset (from doc/api_library.md)
+    # 5. Register the agents with a rich toolset (from doc/api_library.md)
     # -----------------------------------------------------------------
     agent_tool = [
         Agent.scanNearbyEntities,
@@ -145,13 +242,14 @@ if __name__ == "__main__":
         Agent.dismountEntity,
     ]
 
-    env.agent_register(agent_tool=agent_tool, agent_number=1, name_list=["Alice"])
+    env.agent_register(agent_tool=agent_tool, agent_number=len(agent_names), name_list=agent_names)
 
     # -----------------------------------------------------------------
     # 6. Run env + DataManager + direct env.step() REPL (with instruction wrapper)
     # -----------------------------------------------------------------
     with env.run(fast_api=False):
-        dm = DataManager(silent=False)
+        # DataManager only logs below the console level; silent skips those calls outright.
+        dm = DataManager(silent=True)
         try:
             init_state = env.get_init_state()
         except Exception as e:
@@ -160,18 +258,20 @@ if __name__ == "__main__":
         dm.update_database_init(init_state)
 
         print("==============================================")
-        print(" Alice Direct REPL (BaseAgent via env.step, limited actions)")
+        print(f" {', '.join(agent_names)} Direct REPL (BaseAgent via env.step, limited actions)")
         print("==============================================")
         print("Prereqs:")
         print("  1) Minecraft 1.19.2 server at 127.0.0.1:25565 with online-mode=false.")
-        print("  2) /op Alice in-game so she can use commands on your server.")
+        print(f"  2) /op {', '.join(agent_names)} in-game so they can use commands on your server.")
         print("  3) API_KEY_LIST present with an OpenAI key.")
         print("----------------------------------------")
-        print("Each line you type is given directly to Alice via env.step('Alice', wrapped_instruction).")
+        print(f"Each line you type is given directly to {agent_names[0]} via env.step('{agent_names[0]}', wrapped_instruction).")
         print("We wrap your instruction to tell the agent:")
         print("  - Use at MOST 4 Actions (tool calls).")
         print("  - Do NOT repeat the same action type forever.")
         print("  - Then output a Final Answer and stop.")
+        if step_pool is not None:
+            print(f"Registered agents: {', '.join(agent_names)}. Prefix '@Name: ...; @Other: ...' to step several at once.")
         print("Examples:")
         print('  Compliment Tigerish once.')
         print('  Cut down a tree and craft some planks.')
@@ -179,9 +279,10 @@ if __name__ == "__main__":
         print("Type 'quit' or 'exit' to stop.")
         print("==============================================")
 
+        prompt = f"\nInstruction for {agent_names[0]}> " if step_pool is None else "\nInstruction> "
         while True:
             try:
-                user_task = input("\nInstruction for Alice> ").strip()
+                user_task = input(prompt).strip()
             except (EOFError, KeyboardInterrupt):
                 print("\n[INFO] Exiting.")
                 break
@@ -192,37 +293,28 @@ if __name__ == "__main__":
                 print("[INFO] Exiting.")
                 break
 
-            # Wrap the user's instruction with stricter control.
-            wrapped_instruction = f"""
-You are Alice, a Minecraft agent in a live Minecraft world.
-You can only act by calling tools (Actions) such as navigateTo, talkTo, MineBlock, placeBlock, etc.
-
-# High-level instruction
-{user_task}
-
-# Execution rules
-- You must use at least 1 and at most 4 Actions (tool calls) before producing your Final Answer.
-- Do NOT keep repeating the same kind of action (for example, do not call talkTo more than twice).
-- After at most 4 Actions, you MUST output a single 'Final Answer' that:
-    * Briefly explains what you did in the world.
-    * Mentions whether you succeeded or failed at the high-level instruction.
-- Once you output 'Final Answer', STOP. Do not continue acting.
-
-Follow the existing action format and conventions used in your tools.
-"""
-
-            print(f"[INFO] Sending wrapped instruction to Alice.")
-            start_t = time.time()
-
-            try:
-                feedback, detail = env.step("Alice", wrapped_instruction)
-            except Exception as e:
-                print(f"[ERROR] env.step failed: {e}")
+            pairs = []
+            for agent, task in split_agent_instructions(user_task, agent_names):
+                if agent not in agent_names:
+                    print(f"[WARN] {agent} is not a registered agent; skipping.")
+                    continue
+                pairs.append((agent, task))
+            if not pairs:
                 continue
 
-            dt = time.time() - start_t
-
-            print(f"[RESULT] Feedback: {feedback}")
-            print(f"[RESULT] Detail keys: {list(detail.keys())}")
-            print(f"[INFO] env.step took {dt:.2f} seconds.")
+            # Wrap each instruction with stricter control; independent agents step in parallel.
+            print(f"[INFO] Sending wrapped instruction to {', '.join(a for a, _ in pairs)}.")
+            if len(pairs) == 1:
+                results = [timed_step(env, *pairs[0])]
+            else:
+                results = list(step_pool.map(lambda p: timed_step(env, *p), pairs))
+
+            for agent, feedback, detail, dt, error in results:
+                prefix = f"[{agent}] " if len(results) > 1 else ""
+                if error is not None:
+                    print(f"[ERROR] {prefix}env.step failed: {error}")
+                    continue
+                print(f"[RESULT] {prefix}Feedback: {feedback}")
+                print(f"[RESULT] {prefix}Detail keys: {list(detail.keys())}")
+                print(f"[INFO] {prefix}env.step took {dt:.2f} seconds.")
             print("[INFO] You can now enter another instruction, or type 'exit' to quit.")
@@ -1,11 +1,46 @@
+import argparse
+import asyncio
+import atexit
+import functools
+import hashlib
 import json
+import sqlite3
 import time
 import os
+import re
 import sys
-from typing import List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
+import httpx
 import requests
-from openai import OpenAI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAIError,
+    RateLimitError,
+)
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import h2  # noqa: F401  (lets httpx speak HTTP/2)
+except ImportError:  # optional; HTTP/1.1 keep-alive otherwise
+    h2 = None
+
+try:
+    import readline
+except ImportError:  # not available on Windows without pyreadline3
+    readline = None
 
 
 # ==========================
@@ -13,32 +48,57 @@ from openai import OpenAI
 # ==========================
 
 # HTTP endpoint where env/minecraft_server.py is serving its Flask app
-BRIDGE_BASE_URL = "http://localhost:5000"
+BRIDGE_BASE_URL = "http://127.0.0.1:5000"
 
 # Default OpenAI model to use for planning
 DEFAULT_MODEL = "gpt-4o-mini"  # change to "gpt-4o" or any model your key has access to
 
-# How long to sleep between actions so you can see them in-game
-ACTION_DELAY_SECONDS = 1.0
+# Pause between action waves so you can follow them in-game, e.g.
+# MCAGENT_ACTION_DELAY=1 for demos; 0 (the default) runs the plan back to back.
+ACTION_DELAY_SECONDS = max(0.0, float(os.getenv("MCAGENT_ACTION_DELAY", "0")))
+
+# Separates several tasks typed on one line; their plans are requested concurrently
+TASK_SEPARATOR = ";;"
+
+# Planning calls are cut off just above typical latency and retried instead of
+# waiting out the client's default 60 s+ timeout on tail-latency requests.
+OPENAI_TIMEOUT = httpx.Timeout(connect=5.0, read=12.0, write=5.0, pool=5.0)
+
+# Concurrent planning calls share pooled connections (multiplexed over HTTP/2 when
+# h2 is installed) that stay open between REPL turns, so only the first call pays
+# for the TCP and TLS handshakes.
+OPENAI_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120.0)
+PLAN_ATTEMPTS = 3
+PLAN_BACKOFF_SECONDS = 0.5
+
+# Piped (non-TTY) input is planned in one OpenAI Batch API job; poll it this often.
+BATCH_POLL_SECONDS = 10.0
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Tasks typed at the prompt are kept here for arrow-key recall across sessions.
+HISTORY_FILE = Path.home() / ".mcagentgym_history"
+HISTORY_LENGTH = 1000
 
 
 # ==========================
 # OpenAI / LLM Setup
 # ==========================
 
+@functools.lru_cache(maxsize=1)
 def load_api_key_from_file() -> str:
     """
     Load an API key from API_KEY_LIST in the current working directory.
-    Tries OPENAI first, then AGENT_KEY.
+    Tries OPENAI first, then AGENT_KEY. The file is only read once per process.
     """
-    path = os.path.join(os.getcwd(), "API_KEY_LIST")
-    if not os.path.exists(path):
+    path = Path.cwd() / "API_KEY_LIST"
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
         print(f"[ERROR] API_KEY_LIST not found at {path}")
         print("Create API_KEY_LIST with at least one OpenAI key under 'OPENAI' or 'AGENT_KEY'.")
         sys.exit(1)
 
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     keys = data.get("OPENAI") or data.get("AGENT_KEY") or []
     if not keys:
@@ -48,14 +108,17 @@ def load_api_key_from_file() -> str:
     return keys[0]
 
 
-def make_openai_client() -> OpenAI:
+def make_openai_client() -> AsyncOpenAI:
     """
-    Create an OpenAI client using the API key from API_KEY_LIST.
+    Create an async OpenAI client using the API key from API_KEY_LIST.
     """
     api_key = load_api_key_from_file()
-    client = OpenAI(
+    client = AsyncOpenAI(
         api_key=api_key,
-        base_url="https://api.openai.com/v1"
+        base_url="https://api.openai.com/v1",
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0,  # retried with backoff in plan_actions
+        http_client=httpx.AsyncClient(http2=h2 is not None, limits=OPENAI_LIMITS, timeout=OPENAI_TIMEOUT),
     )
     return client
 
@@ -64,47 +127,245 @@ def make_openai_client() -> OpenAI:
 # LLM Prompting
 # ==========================
 
-SYSTEM_PROMPT = """
-You control a single Minecraft agent named Alice.
-
-The user will describe a task in natural language (for example, "walk to Tigerish and say hi").
+SYSTEM_PROMPT = """You control a single Minecraft agent named Alice. Turn the user's task into 1 to 3 tool calls, ending with done. Only use player names mentioned in the task."""
 
-You must output a JSON object ONLY, with no extra text, using this schema:
+_DEPENDS_ON_SCHEMA = {
+    "type": "array",
+    "items": {"type": "integer"},
+    "description": (
+        "Indices of earlier calls this one must wait for. Omit to run after the previous call; "
+        "use [] only if it can safely run at the same time as the calls before it."
+    ),
+}
 
-{
-  "actions": [
+# The plan schema travels as native tool definitions, so the provider enforces
+# the structure and the system prompt stays one sentence.
+PLAN_TOOLS = [
     {
-      "type": "move_to_player",
-      "player": "<player name>"
+        "type": "function",
+        "function": {
+            "name": "move_to_player",
+            "description": "Walk Alice to a player by name (e.g. \"Tigerish\").",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "player": {"type": "string"},
+                    "depends_on": _DEPENDS_ON_SCHEMA,
+                },
+                "required": ["player"],
+            },
+        },
     },
     {
-      "type": "chat_to_player",
-      "player": "<player name>",
-      "message": "<what Alice should say in chat>"
+        "type": "function",
+        "function": {
+            "name": "chat_to_player",
+            "description": "Send a chat message from Alice to a player by name.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "player": {"type": "string"},
+                    "message": {"type": "string", "description": "What Alice should say in chat."},
+                    "depends_on": _DEPENDS_ON_SCHEMA,
+                },
+                "required": ["player", "message"],
+            },
+        },
     },
     {
-      "type": "done",
-      "reason": "<why the task is complete or impossible>"
+        "type": "function",
+        "function": {
+            "name": "done",
+            "description": "Call once, last, when the task is finished or cannot be done.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "reason": {"type": "string", "description": "Why the task is complete or impossible."},
+                    "depends_on": _DEPENDS_ON_SCHEMA,
+                },
+                "required": ["reason"],
+            },
+        },
+    },
+]
+
+
+# Bump whenever SYSTEM_PROMPT or the plan schema changes so stale cached plans are ignored.
+SYSTEM_PROMPT_VERSION = 2
+
+# The system prompt and tool definitions form a constant request prefix; a stable
+# prompt_cache_key routes every planning call to the same provider-side cache.
+PROMPT_CACHE_KEY = f"alice_plan_v{SYSTEM_PROMPT_VERSION}"
+
+# Plans for previously seen tasks are reused instead of asking the LLM again.
+PLAN_CACHE_PATH = os.path.join(".cache", "plan_cache.sqlite")
+PLAN_CACHE_SIZE = 512
+
+# MCAGENT_SEMANTIC_CACHE=1 also matches new tasks against earlier ones by embedding:
+# at or above REPLAY the earlier plan is reused, at or above HINT it is shown to the LLM.
+SEMANTIC_CACHE_ENABLED = os.getenv("MCAGENT_SEMANTIC_CACHE", "0") == "1"
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_REPLAY_THRESHOLD = 0.9
+SEMANTIC_HINT_THRESHOLD = 0.7
+
+
+class PlanCache:
+    """
+    In-memory LRU of raw plan JSON keyed by (prompt version, model, task),
+    backed by a small sqlite table so repeats survive restarts.
+    """
+
+    def __init__(self, path: str, maxsize: int):
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._maxsize = maxsize
+        self._db: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, content TEXT NOT NULL)")
+            self._db.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] Plan cache will not persist to {path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def key(model: str, task_text: str) -> str:
+        raw = f"{SYSTEM_PROMPT_VERSION}\0{model}\0{SYSTEM_PROMPT}\0{_PLAN_TOOLS_JSON}\0{task_text}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self._memory.get(key)
+        if content is not None:
+            self._memory.move_to_end(key)
+            return content
+        if self._db is not None:
+            row = self._db.execute("SELECT content FROM plans WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def put(self, key: str, content: str) -> None:
+        self._remember(key, content)
+        if self._db is not None:
+            try:
+                self._db.execute("INSERT OR REPLACE INTO plans (key, content) VALUES (?, ?)", (key, content))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Could not persist plan: {e}")
+
+    def _remember(self, key: str, content: str) -> None:
+        self._memory[key] = content
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+
+_PLAN_TOOLS_JSON = json.dumps(PLAN_TOOLS, sort_keys=True)
+_PLAN_CACHE = PlanCache(PLAN_CACHE_PATH, PLAN_CACHE_SIZE)
+
+_SEMANTIC_CACHE = None
+if SEMANTIC_CACHE_ENABLED:
+    from ml_models.semantic_cache import SemanticCache
+
+    _SEMANTIC_CACHE = SemanticCache(PLAN_CACHE_SIZE)
+
+# orjson when installed; the stdlib fallback uses the same compact, non-ASCII-preserving
+# format so prompts and cached plans are byte-identical either way.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_dumps(obj: Any) -> str:
+    return _json_dumps_bytes(obj).decode("utf-8")
+
+
+def _parse_plan(content: str) -> Dict[str, Any]:
+    plan = _json_loads(content)
+    if not isinstance(plan, dict):
+        raise ValueError("Top-level JSON is not an object.")
+    if "actions" not in plan:
+        raise ValueError("JSON has no 'actions' key.")
+    if not isinstance(plan["actions"], list):
+        raise ValueError("'actions' must be a list.")
+    return plan
+
+
+def _fallback_plan() -> Dict[str, Any]:
+    """
+    Plan used when the LLM gives no usable answer: just say we are done and can't do it.
+    """
+    return {
+        "actions": [
+            {
+                "type": "done",
+                "reason": "Could not parse LLM response."
+            }
+        ]
     }
-  ]
-}
 
-Rules:
-- Only output JSON, NOTHING else.
-- The top-level key must be "actions".
-- "actions" must be a list of 1 to 3 actions.
-- Allowed action types: "move_to_player", "chat_to_player", "done".
-- Use "move_to_player" to get closer to a player by name (e.g. "Tigerish").
-- Use "chat_to_player" to send a chat message to a player by name.
-- Use a single "done" action when you believe the task is finished or cannot be done.
-- You can mix move and chat actions before "done" if helpful, e.g. move then chat then done.
-- Do not invent player names; use the names mentioned in the task.
-"""
+
+def _plan_request_body(model: str, task_text: str, hint: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+    """
+    Chat-completions request body for planning one task. ``hint`` is an earlier
+    (task, plan JSON) pair that is similar to this one.
+    """
+    user = {"task": task_text}
+    if hint is not None:
+        user["similar_task"] = hint[0]
+        user["similar_task_plan"] = _json_loads(hint[1])["actions"]
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _json_dumps(user)},
+        ],
+        "tools": PLAN_TOOLS,
+        "tool_choice": "auto",
+        "temperature": 0.2,
+    }
+
+
+def _plan_from_tool_calls(calls: List[Any], cache_key: str) -> Dict[str, Any]:
+    """
+    Build, validate and cache a plan from (function name, JSON arguments) pairs.
+    Raises ValueError if the calls do not form a usable plan.
+    """
+    if not calls:
+        raise ValueError("response contains no tool calls")
+    actions = [{"type": name, **_json_loads(arguments or "{}")} for name, arguments in calls]
+    content = _json_dumps({"actions": actions})
+    plan = _parse_plan(content)
+    _PLAN_CACHE.put(cache_key, content)
+    return plan
+
+
+async def _embed_task(client: AsyncOpenAI, task_text: str) -> Optional[List[float]]:
+    try:
+        response = await client.embeddings.create(model=EMBEDDING_MODEL, input=task_text)
+    except OpenAIError as e:
+        print(f"[WARN] Could not embed task for the semantic cache: {type(e).__name__}")
+        return None
+    return response.data[0].embedding
+
+
+def _players_in_task(content: str, task_text: str) -> bool:
+    """
+    True if every player the plan addresses is named in the task, so replaying it
+    for a similar task cannot send Alice to someone the user did not mention.
+    """
+    actions = _json_loads(content).get("actions", [])
+    return all(a["player"] in task_text for a in actions if isinstance(a.get("player"), str))
 
 
-def plan_actions(client: OpenAI, model: str, task_text: str) -> Dict[str, Any]:
+async def plan_actions(client: AsyncOpenAI, model: str, task_text: str) -> Dict[str, Any]:
     """
-    Use the LLM to turn the user's task into a JSON action plan.
+    Use the LLM to turn the user's task into an action plan via tool calls.
     Returns a dict like:
     {
       "actions": [
@@ -114,62 +375,158 @@ def plan_actions(client: OpenAI, model: str, task_text: str) -> Dict[str, Any]:
       ]
     }
     """
-    user_prompt = json.dumps(
-        {
-            "task": task_text
-        },
-        ensure_ascii=False
-    )
-
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.2,
-    )
-
-    content = response.choices[0].message.content
-    # Expecting pure JSON
+    cache_key = PlanCache.key(model, task_text)
+    cached = _PLAN_CACHE.get(cache_key)
+    if cached is not None:
+        print("[INFO] Reusing cached plan for this task.")
+        return _parse_plan(cached)
+
+    embedding = None
+    hint = None
+    if _SEMANTIC_CACHE is not None:
+        embedding = await _embed_task(client, task_text)
+        match = _SEMANTIC_CACHE.lookup(embedding) if embedding is not None else None
+        if match is not None:
+            score, similar_task, content = match
+            if score >= SEMANTIC_REPLAY_THRESHOLD and _players_in_task(content, task_text):
+                print(f"[INFO] Reusing plan of similar task {similar_task!r} (similarity {score:.2f}).")
+                _PLAN_CACHE.put(cache_key, content)
+                return _parse_plan(content)
+            if score >= SEMANTIC_HINT_THRESHOLD:
+                hint = (similar_task, content)
+
+    response = None
+    for attempt in range(PLAN_ATTEMPTS):
+        try:
+            response = await client.chat.completions.create(
+                **_plan_request_body(model, task_text, hint),
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+            )
+            break
+        except (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError) as e:
+            # transient: the ones the SDK would retry itself with max_retries > 0
+            print(f"[WARN] Planning attempt {attempt + 1}/{PLAN_ATTEMPTS} failed: {type(e).__name__}")
+            if attempt + 1 < PLAN_ATTEMPTS:
+                await asyncio.sleep(PLAN_BACKOFF_SECONDS * 2 ** attempt)
+        except OpenAIError as e:
+            print(f"[ERROR] Planning request failed: {e}")
+            return _fallback_plan()
+    if response is None:
+        return _fallback_plan()
+
+    message = response.choices[0].message
     try:
-        plan = json.loads(content)
-        if not isinstance(plan, dict):
-            raise ValueError("Top-level JSON is not an object.")
-        if "actions" not in plan:
-            raise ValueError("JSON has no 'actions' key.")
-        if not isinstance(plan["actions"], list):
-            raise ValueError("'actions' must be a list.")
-        return plan
+        calls = [(call.function.name, call.function.arguments) for call in message.tool_calls or []]
+        plan = _plan_from_tool_calls(calls, cache_key)
     except Exception as e:
-        print("[ERROR] Failed to parse LLM response as JSON.")
-        print("Raw response:")
-        print(content)
-        print("Parse error:", e)
-        # Fallback: just say we are done and can't do it.
-        return {
-            "actions": [
-                {
-                    "type": "done",
-                    "reason": "Could not parse LLM response."
-                }
-            ]
-        }
+        print(f"[ERROR] LLM plan could not be read from tool calls ({e}). Raw message: {message!r}")
+        return _fallback_plan()
+    if embedding is not None:
+        _SEMANTIC_CACHE.add(embedding, task_text, _json_dumps(plan))
+    return plan
+
+
+async def plan_many(client: AsyncOpenAI, model: str, tasks: List[str]) -> List[Dict[str, Any]]:
+    """
+    Plan several tasks concurrently; results are returned in input order.
+    """
+    return list(await asyncio.gather(*(plan_actions(client, model, t) for t in tasks)))
+
+
+async def plan_batch(client: AsyncOpenAI, model: str, tasks: List[str]) -> List[Dict[str, Any]]:
+    """
+    Plan many tasks through one OpenAI Batch API job (half price, no rate-limit
+    pressure, but minutes to hours of latency). Cached tasks are not resubmitted;
+    results are returned in input order.
+
+    The pinned openai client predates the batches resource, so the endpoints are
+    called through its generic request helpers.
+    """
+    plans: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+    lines = []
+    for i, task in enumerate(tasks):
+        cached = _PLAN_CACHE.get(PlanCache.key(model, task))
+        if cached is not None:
+            plans[i] = _parse_plan(cached)
+            continue
+        body = {**_plan_request_body(model, task), "prompt_cache_key": PROMPT_CACHE_KEY}
+        lines.append(_json_dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        }))
+
+    if lines:
+        upload = await client.files.create(
+            file=("plan_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = (await client.post(
+            "/batches",
+            body={"input_file_id": upload.id, "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+            cast_to=httpx.Response,
+        )).json()
+        print(f"[INFO] Submitted batch {batch['id']} with {len(lines)} task(s); waiting for results.")
+        while batch["status"] not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch = (await client.get(f"/batches/{batch['id']}", cast_to=httpx.Response)).json()
+        print(f"[INFO] Batch {batch['id']} finished with status {batch['status']!r}.")
+
+        output_file_id = batch.get("output_file_id")
+        if output_file_id:
+            output = await client.get(f"/files/{output_file_id}/content", cast_to=httpx.Response)
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                item = _json_loads(line)
+                i = int(item["custom_id"])
+                try:
+                    message = item["response"]["body"]["choices"][0]["message"]
+                    calls = [
+                        (call["function"]["name"], call["function"].get("arguments"))
+                        for call in message.get("tool_calls") or []
+                    ]
+                    plans[i] = _plan_from_tool_calls(calls, PlanCache.key(model, tasks[i]))
+                except Exception as e:
+                    print(f"[ERROR] Batch result for {tasks[i]!r} could not be read ({e}).")
+
+    return [plan if plan is not None else _fallback_plan() for plan in plans]
 
 
 # ==========================
 # Bridge / HTTP calls
 # ==========================
 
+# One keep-alive session for every bridge call so consecutive actions reuse the
+# same TCP connection. Only connection failures are retried: the bridge's POST
+# endpoints move the bot and must not be replayed after they were received.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1),
+    ),
+)
+atexit.register(_SESSION.close)
+
+
 def post_json(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Helper to POST JSON to the bridge's HTTP API and return JSON response.
     """
     url = f"{BRIDGE_BASE_URL}{path}"
     try:
-        resp = requests.post(url, json=payload, timeout=30)
+        resp = _SESSION.post(
+            url,
+            data=_json_dumps_bytes(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=30,
+        )
         resp.raise_for_status()
-        return resp.json()
+        return _json_loads(resp.content)
     except Exception as e:
         print(f"[ERROR] Request to {url} failed:", e)
         return {"message": str(e), "status": False}
@@ -184,7 +541,6 @@ def action_move_to_player(player: str) -> None:
     payload = {"name": player}
     result = post_json("/post_move_to", payload)
     print(f"  -> {result.get('message')}")
-    time.sleep(ACTION_DELAY_SECONDS)
 
 
 def action_chat_to_player(player: str, message: str) -> None:
@@ -199,43 +555,152 @@ def action_chat_to_player(player: str, message: str) -> None:
     }
     result = post_json("/post_talk_to", payload)
     print(f"  -> {result.get('message')}")
-    time.sleep(ACTION_DELAY_SECONDS)
 
 
-def apply_actions(actions: List[Dict[str, Any]]) -> None:
+def _run_action(action: Dict[str, Any]) -> None:
     """
-    Execute the planned actions one by one by calling the bridge API.
+    Execute a single planned action by calling the bridge API.
     """
+    a_type = action.get("type")
+    if a_type == "move_to_player":
+        player = action.get("player")
+        if not player:
+            print("[WARN] move_to_player action without 'player' field. Skipping.")
+            return
+        action_move_to_player(player)
+
+    elif a_type == "chat_to_player":
+        player = action.get("player")
+        message = action.get("message", "")
+        if not player or not message:
+            print("[WARN] chat_to_player action missing 'player' or 'message'. Skipping.")
+            return
+        action_chat_to_player(player, message)
+
+    elif a_type == "done":
+        reason = action.get("reason", "(no reason provided)")
+        print(f"[DONE] {reason}")
+        # Done doesn't call the game API; it's just meta.
+    else:
+        print(f"[WARN] Unknown action type '{a_type}'. Skipping.")
+
+
+def _action_waves(actions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group actions into waves that can run concurrently.
+
+    An action waits for the indices listed in its "depends_on"; without that
+    field it waits for the previous action, so plans that do not mark
+    dependencies keep running strictly in order.
+    """
+    levels: List[int] = []
     for idx, action in enumerate(actions):
-        a_type = action.get("type")
-        if a_type == "move_to_player":
-            player = action.get("player")
-            if not player:
-                print("[WARN] move_to_player action without 'player' field. Skipping.")
-                continue
-            action_move_to_player(player)
+        deps = action.get("depends_on")
+        if not isinstance(deps, list):
+            deps = [idx - 1] if idx > 0 else []
+        deps = [d for d in deps if isinstance(d, int) and 0 <= d < idx]
+        levels.append(1 + max(levels[d] for d in deps) if deps else 0)
+    waves: List[List[Dict[str, Any]]] = [[] for _ in range(max(levels, default=-1) + 1)]
+    for level, action in zip(levels, actions):
+        waves[level].append(action)
+    return waves
 
-        elif a_type == "chat_to_player":
-            player = action.get("player")
-            message = action.get("message", "")
-            if not player or not message:
-                print("[WARN] chat_to_player action missing 'player' or 'message'. Skipping.")
-                continue
-            action_chat_to_player(player, message)
 
-        elif a_type == "done":
-            reason = action.get("reason", "(no reason provided)")
-            print(f"[DONE] {reason}")
-            # Done doesn't call the game API; it's just meta.
+def apply_actions(actions: List[Dict[str, Any]]) -> None:
+    """
+    Execute the planned actions by calling the bridge API, running the actions
+    of each dependency wave concurrently and pausing ACTION_DELAY_SECONDS
+    between waves.
+    """
+    waves = _action_waves(actions)
+    for i, wave in enumerate(waves):
+        if len(wave) == 1:
+            _run_action(wave[0])
         else:
-            print(f"[WARN] Unknown action type '{a_type}'. Skipping.")
+            with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+                list(pool.map(_run_action, wave))
+        if ACTION_DELAY_SECONDS > 0 and i + 1 < len(waves):
+            time.sleep(ACTION_DELAY_SECONDS)
+
+
+# ==========================
+# Speculative first move
+# ==========================
+
+# "walk to Tigerish ..." almost always plans move_to_player(Tigerish) first, so
+# that move can start while the LLM is still planning. Only capitalised
+# Minecraft-style names count as a confident guess.
+_MOVE_TO_PLAYER_RE = re.compile(r"\b(?i:walk|go|run|move|head)\s+(?i:over\s+)?(?i:to)\s+(?!(?i:the|this|that|my|your|some)\b)([A-Z][A-Za-z0-9_]{2,15})\b")
+
+
+def _guess_first_move(task: str) -> Optional[str]:
+    match = _MOVE_TO_PLAYER_RE.search(task)
+    return match.group(1) if match else None
+
+
+def _drop_speculated_move(actions: List[Dict[str, Any]], player: str) -> List[Dict[str, Any]]:
+    """
+    Remove the plan's first action if it is the move we already ran, shifting
+    the remaining "depends_on" indices to match.
+    """
+    first = actions[0] if actions else {}
+    if first.get("type") != "move_to_player" or str(first.get("player", "")).lower() != player.lower():
+        print("[INFO] Plan did not start with the speculative move; running it as planned.")
+        return actions
+    rest = []
+    for action in actions[1:]:
+        deps = action.get("depends_on")
+        if isinstance(deps, list):
+            action = {**action, "depends_on": [d - 1 for d in deps if isinstance(d, int) and d > 0]}
+        rest.append(action)
+    return rest
 
 
 # ==========================
 # Simple REPL
 # ==========================
 
-def main():
+def _run_batch(loop: asyncio.AbstractEventLoop, client: AsyncOpenAI, model: str, lines: Iterable[str], source: str) -> None:
+    """
+    Non-interactive mode (--tasks-file, or stdin is a file or pipe): read every task
+    up front, plan them all in one batch job, then execute the plans in input order.
+    """
+    tasks = []
+    for line in lines:
+        line = line.strip()
+        if line.lower() in ("quit", "exit"):
+            break
+        tasks.extend(t.strip() for t in line.split(TASK_SEPARATOR) if t.strip())
+    if not tasks:
+        print(f"[INFO] No tasks in {source}.")
+        return
+
+    print(f"[INFO] Planning {len(tasks)} task(s) from {source} with the Batch API.")
+    plans = loop.run_until_complete(plan_batch(client, model, tasks))
+    for task, plan in zip(tasks, plans):
+        actions = plan.get("actions", [])
+        if not actions:
+            print(f"[WARN] LLM returned no actions for {task!r}.")
+            continue
+        print(f"[INFO] Executing actions for {task!r}:")
+        apply_actions(actions)
+
+
+def _enable_history():
+    """
+    Give the task prompt line editing and a persistent history when readline is available.
+    """
+    if readline is None:
+        return
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:  # first run, or unreadable file
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+    atexit.register(readline.write_history_file, HISTORY_FILE)
+
+
+def main(tasks_file: Optional[str] = None):
     print("========================================")
     print(" Alice Live Controller")
     print("========================================")
@@ -249,45 +714,80 @@ def main():
     print("Examples:")
     print('  Walk to Tigerish and say hello.')
     print('  Go talk to Tigerish and ask how they are.')
+    print(f"Separate several tasks with '{TASK_SEPARATOR}' to plan them concurrently.")
     print("Type 'quit' or 'exit' to stop.")
     print("========================================")
 
     client = make_openai_client()
     model = DEFAULT_MODEL
+    # One loop for the whole session so the async client's connections stay
+    # bound to a live loop between REPL turns.
+    loop = asyncio.new_event_loop()
 
     # Quick connectivity check
     print("[INFO] Checking connection to bridge at", BRIDGE_BASE_URL)
     try:
-        ping_resp = requests.get(f"{BRIDGE_BASE_URL}/post_ping", timeout=5)
+        ping_resp = _SESSION.get(f"{BRIDGE_BASE_URL}/post_ping", timeout=5)
         print("  -> /post_ping response:", ping_resp.text)
     except Exception as e:
         print("[WARN] Could not reach /post_ping:", e)
         print("Make sure env\\minecraft_server.py is running.")
         # We continue anyway; maybe ping isn't available.
 
-    while True:
-        try:
-            task = input("\nTask for Alice> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("\n[INFO] Exiting.")
-            break
-
-        if not task:
-            continue
-        if task.lower() in ("quit", "exit"):
-            print("[INFO] Exiting.")
-            break
-
-        print(f"[INFO] Planning actions for task: {task!r}")
-        plan = plan_actions(client, model, task)
-        actions = plan.get("actions", [])
-        if not actions:
-            print("[WARN] LLM returned no actions.")
-            continue
+    try:
+        if tasks_file is not None:
+            with open(tasks_file, encoding="utf-8") as f:
+                _run_batch(loop, client, model, f, tasks_file)
+            return
+        if not sys.stdin.isatty():
+            _run_batch(loop, client, model, sys.stdin, "stdin")
+            return
+
+        _enable_history()
+        while True:
+            try:
+                line = input("\nTask for Alice> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print("\n[INFO] Exiting.")
+                break
+
+            if not line:
+                continue
+            if line.lower() in ("quit", "exit"):
+                print("[INFO] Exiting.")
+                break
 
-        print("[INFO] Executing actions:")
-        apply_actions(actions)
+            tasks = [t.strip() for t in line.split(TASK_SEPARATOR) if t.strip()]
+            if not tasks:
+                continue
+            for task in tasks:
+                print(f"[INFO] Planning actions for task: {task!r}")
+            speculative_player = _guess_first_move(tasks[0])
+            speculative_move = None
+            if speculative_player is not None:
+                print(f"[INFO] Moving to {speculative_player} while the plan is generated.")
+                speculative_move = loop.run_in_executor(None, action_move_to_player, speculative_player)
+            plans = loop.run_until_complete(plan_many(client, model, tasks))
+            if speculative_move is not None:
+                loop.run_until_complete(speculative_move)
+                plans[0] = {**plans[0], "actions": _drop_speculated_move(plans[0].get("actions", []), speculative_player)}
+
+            for task, plan in zip(tasks, plans):
+                actions = plan.get("actions", [])
+                if not actions:
+                    print(f"[WARN] LLM returned no actions for {task!r}.")
+                    continue
+
+                print(f"[INFO] Executing actions for {task!r}:")
+                apply_actions(actions)
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Plan and run natural-language tasks for Alice.")
+    parser.add_argument("--tasks-file", type=str, default=None,
+                        help="plan every task in this file (one per line) in a single batch job, then exit")
+    args = parser.parse_args()
+    main(args.tasks_file)
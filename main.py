@@ -14,20 +14,15 @@ import os
 import queue
 import signal
 import sys
+import threading
 import time
+import tkinter
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from controller.multiprocess_core import (
-    DEFAULT_SHORT_TASK_TEMPLATE,
-    WorkerConfig,
-    load_api_keys,
-    resolve_env_type,
-    spawn_workers,
-)
-from controller.task_library import TASK_LIBRARY
-from controller.name_pool import JsonNamePool
+from typing import Any, Dict, List, Optional, Tuple
 
+# Checked before the controller imports, which pull in VillagerBench and the
+# LLM stack, so a missing GUI dependency is reported straight away.
 try:
     import customtkinter as ctk
 except ImportError:
@@ -38,6 +33,25 @@ except ImportError:
     )
     sys.exit(1)
 
+from controller.multiprocess_core import (
+    StatusBus,
+    WorkerConfig,
+    join_workers,
+    load_api_keys,
+    resolve_env_type,
+    spawn_workers,
+)
+from controller.name_pool import JsonNamePool
+
+# Status messages applied per Tk callback; the rest wait for the next one so
+# a burst from many workers never blocks repaints for long.
+STATUS_APPLY_BATCH = 32
+# Status batches the reader thread may queue for the Tk thread; further
+# batches are dropped (and counted) so a stalled GUI cannot grow without bound.
+STATUS_QUEUE_MAX = 1024
+# Events where only the latest message per agent matters.
+COALESCED_EVENTS = frozenset({"step", "error"})
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="VillagerAgent Multi-Agent GUI")
@@ -66,7 +80,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--llm-model", type=str, default=os.environ.get("VILLAGER_AGENT_MODEL", "gpt-4-1106-preview"))
     parser.add_argument("--llm-base-url", type=str, default=os.environ.get("VILLAGER_AGENT_BASE_URL", "https://api.openai.com/v1"))
     parser.add_argument("--clear-logs", action="store_true", help="Allow each worker to wipe logs/metrics.")
-    parser.add_argument("--task-template", type=str, default=DEFAULT_SHORT_TASK_TEMPLATE)
+    parser.add_argument("--task-template", type=str, default=None, help="Override the default worker prompt template.")
     return parser.parse_args()
 
 
@@ -82,7 +96,13 @@ class AgentGUI(ctk.CTk):
         self.status_info: Dict[str, Dict[str, Any]] = {}
         self.worker_processes: List[mp.Process] = []
         self.stop_event: Optional[mp.Event] = None
-        self.status_queue: Optional[mp.Queue] = None
+        self.status_bus: Optional[StatusBus] = None
+        self._fonts: Dict[Tuple[int, str, str], ctk.CTkFont] = {}
+        self._launching = False
+        # Status batches handed from the bus reader thread to the Tk thread.
+        self._ui_queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=STATUS_QUEUE_MAX)
+        self.dropped_status_messages = 0
+        self._status_backlog: "deque[Dict[str, Any]]" = deque()
 
         launcher_dir = Path(__file__).resolve().parent
         json_path = launcher_dir / "usernames.json"
@@ -96,7 +116,15 @@ class AgentGUI(ctk.CTk):
         self._build_ui()
 
         self.protocol("WM_DELETE_WINDOW", self._on_close)
-        self.after(1000, self._refresh_status)
+
+    def _font(self, size: int, weight: str = "normal", slant: str = "roman") -> ctk.CTkFont:
+        # One CTkFont per distinct style, shared by every widget that uses it,
+        # instead of a new Tk font per label and per row.
+        key = (size, weight, slant)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = ctk.CTkFont(size=size, weight=weight, slant=slant)
+        return font
 
     def _build_ui(self):
         self.grid_rowconfigure(1, weight=1)
@@ -109,7 +137,7 @@ class AgentGUI(ctk.CTk):
         title_label = ctk.CTkLabel(
             header_frame,
             text="VillagerAgent Multi-Agent Control Panel",
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=self._font(size=20, weight="bold"),
         )
         title_label.grid(row=0, column=0, sticky="w")
 
@@ -170,7 +198,7 @@ class AgentGUI(ctk.CTk):
         info_label = ctk.CTkLabel(
             header_frame,
             text=f"Server: {self.args.host}:{self.args.port} | Model: {self.args.llm_model}",
-            font=ctk.CTkFont(size=11, slant="italic"),
+            font=self._font(size=11, slant="italic"),
         )
         info_label.grid(row=1, column=0, sticky="w", pady=(6, 0))
 
@@ -184,7 +212,7 @@ class AgentGUI(ctk.CTk):
         header_bar.grid_columnconfigure(0, weight=1)
         labels = ["Agent", "Status", "Last Result"]
         for idx, label in enumerate(labels):
-            widget = ctk.CTkLabel(header_bar, text=label, font=ctk.CTkFont(size=13, weight="bold"))
+            widget = ctk.CTkLabel(header_bar, text=label, font=self._font(size=13, weight="bold"))
             widget.grid(row=0, column=idx, sticky="w", padx=(8 if idx == 0 else 4, 4))
 
         self.agent_list_frame = ctk.CTkScrollableFrame(list_frame)
@@ -239,10 +267,10 @@ class AgentGUI(ctk.CTk):
         except ValueError:
             pass
 
-    def _build_worker_configs(self) -> List[WorkerConfig]:
+    def _build_worker_configs(self, agent_names: List[str]) -> List[WorkerConfig]:
         configs: List[WorkerConfig] = []
         env_kind = resolve_env_type(self.args.env_type)
-        for idx, name in enumerate(self.agent_names):
+        for idx, name in enumerate(agent_names):
             base_port = self.args.base_port_start + idx * self.args.port_step
             configs.append(
                 WorkerConfig(
@@ -264,64 +292,140 @@ class AgentGUI(ctk.CTk):
                     api_keys=self.api_keys,
                     clear_logs=self.args.clear_logs,
                     task_template=self.args.task_template,
-                    task_library=TASK_LIBRARY,
                 )
             )
         return configs
 
     def _on_launch_clicked(self):
-        if self.worker_processes:
+        if self.worker_processes or self._launching:
             return
         if not self.agent_names:
             print("[GUI] No agents queued; add some first.")
             return
+        # Tk variables are read here; everything slow runs on the launch thread.
         self._sync_tempo_from_ui()
-        configs = self._build_worker_configs()
-        self.status_queue = mp.Queue()
-        self.worker_processes, self.stop_event = spawn_workers(configs, status_queue=self.status_queue)
+        self._launching = True
         self.launch_button.configure(state="disabled")
         self.add_button.configure(state="disabled")
+        threading.Thread(
+            target=self._launch_thread, args=(list(self.agent_names),), name="launcher", daemon=True
+        ).start()
+
+    def _launch_thread(self, agent_names: List[str]) -> None:
+        # Building configs and starting dozens of processes would freeze the
+        # window if done in the Tk callback.
+        try:
+            configs = self._build_worker_configs(agent_names)
+            bus = StatusBus()
+            workers, stop_event = spawn_workers(configs, status_bus=bus)
+        except Exception as exc:
+            print(f"[GUI] Failed to launch workers: {exc}")
+            try:
+                self.after_idle(self._on_launch_failed)
+            except (RuntimeError, tkinter.TclError):
+                pass
+            return
+        try:
+            self.after_idle(self._on_launch_done, workers, stop_event, bus)
+        except (RuntimeError, tkinter.TclError):
+            # Window closed while launching; nobody else will stop these.
+            stop_event.set()
+
+    def _on_launch_done(self, workers: List[mp.Process], stop_event: mp.Event, bus: StatusBus):
+        self._launching = False
+        self.worker_processes, self.stop_event, self.status_bus = workers, stop_event, bus
+        threading.Thread(
+            target=self._reader_loop, args=(bus,), name="status-reader", daemon=True
+        ).start()
         self.stop_button.configure(state="normal")
 
+    def _on_launch_failed(self):
+        self._launching = False
+        self.launch_button.configure(state="normal")
+        self.add_button.configure(state="normal")
+
     def _stop_workers(self):
         if not self.worker_processes or self.stop_event is None:
             return
         self.stop_event.set()
-        for p in self.worker_processes:
-            p.join(timeout=5.0)
+        join_workers(self.worker_processes, timeout=5.0)
+        if self.status_bus is not None:
+            # Wakes the reader thread, which forwards the last messages and exits.
+            self.status_bus.close()
         self.worker_processes = []
         self.launch_button.configure(state="normal")
         self.add_button.configure(state="normal")
         self.stop_button.configure(state="disabled")
 
-    def _refresh_status(self):
-        if self.status_queue is not None:
-            while True:
-                try:
-                    msg = self.status_queue.get_nowait()
-                except queue.Empty:
-                    break
-                agent = msg.get("agent")
-                event = msg.get("event")
-                row = self.rows.get(agent)
-                if not row:
+    def _reader_loop(self, bus: StatusBus) -> None:
+        # Runs off the Tk thread: blocks on the worker pipes and schedules the
+        # row updates on the Tk thread as soon as anything arrives.
+        while not bus.closed:
+            messages = bus.receive()
+            if not messages:
+                continue
+            try:
+                self._ui_queue.put_nowait(messages)
+            except queue.Full:
+                if not self.dropped_status_messages:
+                    print("[GUI] Status queue full; dropping worker updates until it drains.")
+                self.dropped_status_messages += len(messages)
+                continue
+            try:
+                self.after_idle(self._apply_status_updates)
+            except (RuntimeError, tkinter.TclError):
+                # Window already destroyed.
+                return
+
+    def _apply_status_updates(self):
+        backlog = self._status_backlog
+        while len(backlog) < STATUS_APPLY_BATCH:
+            try:
+                backlog.extend(self._ui_queue.get_nowait())
+            except queue.Empty:
+                break
+        batch = [backlog.popleft() for _ in range(min(STATUS_APPLY_BATCH, len(backlog)))]
+
+        # Within the batch a later step/error for the same agent overwrites the
+        # same labels, so apply only the last one of each.
+        seen = set()
+        coalesced = []
+        for msg in reversed(batch):
+            event = msg.get("event")
+            if event in COALESCED_EVENTS:
+                key = (msg.get("agent"), event)
+                if key in seen:
                     continue
-                status_label: ctk.CTkLabel = row["status_label"]
-                result_label: ctk.CTkLabel = row["result_label"]
-                if event == "starting":
-                    status_label.configure(text="starting", text_color="orange")
-                elif event == "running":
-                    status_label.configure(text="running", text_color="green")
-                elif event == "step":
-                    status_label.configure(text="active", text_color="green")
-                    feedback = msg.get("feedback") or ""
-                    result_label.configure(text=feedback[:120])
-                elif event == "error":
-                    status_label.configure(text="error", text_color="red")
-                    result_label.configure(text=msg.get("message", "error"))
-                elif event == "stopped":
-                    status_label.configure(text="stopped", text_color="gray")
-        self.after(1000, self._refresh_status)
+                seen.add(key)
+            coalesced.append(msg)
+        for msg in reversed(coalesced):
+            self._apply_status_msg(msg)
+
+        if backlog or not self._ui_queue.empty():
+            # Let Tk repaint before the next slice.
+            self.after(0, self._apply_status_updates)
+
+    def _apply_status_msg(self, msg: Dict[str, Any]):
+        agent = msg.get("agent")
+        event = msg.get("event")
+        row = self.rows.get(agent)
+        if not row:
+            return
+        status_label: ctk.CTkLabel = row["status_label"]
+        result_label: ctk.CTkLabel = row["result_label"]
+        if event == "starting":
+            status_label.configure(text="starting", text_color="orange")
+        elif event == "running":
+            status_label.configure(text="running", text_color="green")
+        elif event == "step":
+            status_label.configure(text="active", text_color="green")
+            feedback = msg.get("feedback") or ""
+            result_label.configure(text=feedback[:120])
+        elif event == "error":
+            status_label.configure(text="error", text_color="red")
+            result_label.configure(text=msg.get("message", "error"))
+        elif event == "stopped":
+            status_label.configure(text="stopped", text_color="gray")
 
     def _on_close(self):
         self._stop_workers()
@@ -3,18 +3,137 @@ Simple JSONL logger for step performance analysis.
 
 Logs each env.step execution with duration, feedback, and configuration
 for later analysis of which settings lead to faster, more successful steps.
+
+log_step only enqueues the record; a daemon writer thread (one per process)
+takes every record queued so far, serialises them with orjson when installed,
+or a single pre-built stdlib encoder otherwise, and appends the burst in one
+write through a 64 KiB buffer. The buffer is
+flushed every FLUSH_EVERY records, before fork and at exit; call flush_log()
+before a process leaves through os._exit (multiprocessing workers) so no
+records are lost. Callers must not mutate a record after logging it.
+
+With ML_LOG_FORMAT=msgpack (requires the msgpack package) records are instead
+written to steps.msgpack as a little-endian uint32 length followed by the
+msgpack body, which is smaller and faster to load for analysis. read_steps()
+iterates either format.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
+import mmap
+import os
+import queue
+import struct
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary log format
+    msgpack = None
 
 
+LOG_FORMAT = os.environ.get("ML_LOG_FORMAT", "jsonl").lower()
+if LOG_FORMAT == "msgpack" and msgpack is None:
+    print("[ML_LOG] ML_LOG_FORMAT=msgpack but msgpack is not installed; using jsonl.")
+    LOG_FORMAT = "jsonl"
+
 LOG_DIR = Path("ml_models/logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
-LOG_FILE = LOG_DIR / "steps.jsonl"
+LOG_FILE = LOG_DIR / ("steps.msgpack" if LOG_FORMAT == "msgpack" else "steps.jsonl")
+
+# Records buffered before an explicit flush; 1 makes every record durable immediately.
+FLUSH_EVERY = max(1, int(os.environ.get("ML_LOG_FLUSH_EVERY", "32")))
+
+# How long flush_log waits for the writer thread to catch up.
+FLUSH_TIMEOUT = 5.0
+
+_json_encoder = json.JSONEncoder()
+_json_loads = orjson.loads if orjson is not None else json.loads
+_record_len = struct.Struct("<I")
+
+_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_writer_lock = threading.Lock()
+_writer_pid = None
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    if LOG_FORMAT == "msgpack":
+        body = msgpack.packb(record, use_bin_type=True)
+        return _record_len.pack(len(body)) + body
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (_json_encoder.encode(record) + "\n").encode("utf-8")
+
+
+def _take_burst() -> list:
+    # Block for one item, then take whatever else is already queued.
+    items = [_queue.get()]
+    while True:
+        try:
+            items.append(_queue.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _drain() -> None:
+    fh = LOG_FILE.open("ab", buffering=1 << 16)
+    pending = 0
+    while True:
+        chunks = []
+        flush_requests = []
+        for item in _take_burst():
+            if isinstance(item, threading.Event):
+                # flush request from flush_log()
+                flush_requests.append(item)
+                continue
+            try:
+                chunks.append(_encode_record(item))
+            except Exception as e:
+                print(f"[ML_LOG] Failed to encode log record: {e}")
+        try:
+            if chunks:
+                # one write per burst of records instead of one per record
+                fh.write(b"".join(chunks))
+                pending += len(chunks)
+            if flush_requests or pending >= FLUSH_EVERY:
+                fh.flush()
+                pending = 0
+        except Exception as e:
+            print(f"[ML_LOG] Failed to write log: {e}")
+        for done in flush_requests:
+            done.set()
+
+
+def _ensure_writer() -> None:
+    # The writer thread does not survive fork; each process starts its own.
+    global _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid != os.getpid():
+            threading.Thread(target=_drain, name="ml-log-writer", daemon=True).start()
+            _writer_pid = os.getpid()
+
+
+def flush_log() -> None:
+    """
+    Block until every record logged so far is written to disk.
+    """
+    if _writer_pid != os.getpid():
+        return
+    done = threading.Event()
+    _queue.put(done)
+    if not done.wait(FLUSH_TIMEOUT):
+        print("[ML_LOG] Timed out waiting for the log writer to flush.")
 
 
 def log_step(record: Dict[str, Any]) -> None:
@@ -24,9 +143,47 @@ def log_step(record: Dict[str, Any]) -> None:
     Args:
         record: Dictionary containing step metadata (agent, task_id, duration, feedback, etc.)
     """
-    try:
-        with LOG_FILE.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
-    except Exception as e:
-        print(f"[ML_LOG] Failed to write log: {e}")
+    _ensure_writer()
+    _queue.put(record)
+
+
+def read_steps(path: Optional[Union[str, Path]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate the records of a step log; the format follows the file suffix
+    (.msgpack or .jsonl). A truncated trailing record is skipped.
+
+    Args:
+        path: Log file to read, defaults to this process's LOG_FILE.
+    """
+    path = Path(path) if path is not None else LOG_FILE
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if path.suffix == ".msgpack":
+            if msgpack is None:
+                raise RuntimeError("Reading a .msgpack step log requires the msgpack package.")
+            pos, end = 0, len(mm)
+            while pos + _record_len.size <= end:
+                (size,) = _record_len.unpack_from(mm, pos)
+                pos += _record_len.size
+                if pos + size > end:
+                    break
+                yield msgpack.unpackb(mm[pos:pos + size], raw=False)
+                pos += size
+        else:
+            for line in iter(mm.readline, b""):
+                if line.endswith(b"\n"):
+                    yield _json_loads(line)
+
+
+def _reset_after_fork() -> None:
+    global _queue, _writer_lock, _writer_pid
+    _queue = queue.SimpleQueue()
+    _writer_lock = threading.Lock()
+    _writer_pid = None
+
 
+atexit.register(flush_log)
+if hasattr(os, "register_at_fork"):
+    # Drain first so a forked child never writes the parent's records again.
+    os.register_at_fork(before=flush_log, after_in_child=_reset_after_fork)
@@ -0,0 +1,47 @@
+"""
+In-process LRU cache for LLM planner responses.
+
+Sits in front of the JSON file cache that OpenAILanguageModel keeps in
+.cache/openai.cache, so a prompt that was already answered in this process
+skips both the API call and the read/parse of the whole cache file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class PromptCache:
+    """
+    Thread-safe LRU mapping a prompt digest to the model's response text.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str) -> str:
+        return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+
+# Shared by every language model instance in the process.
+PROMPT_CACHE = PromptCache()
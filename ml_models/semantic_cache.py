@@ -0,0 +1,72 @@
+"""
+In-process semantic cache for planner responses.
+
+Keeps the embedding of every task planned so far as a row of one normalised
+matrix, so finding the most similar earlier task is a single matrix-vector
+product. Callers decide what a similarity score is good for (replaying the
+stored plan outright, or passing it to the LLM as a hint).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Thread-safe store of (task, plan) pairs looked up by cosine similarity of
+    task embeddings. The oldest entries are dropped beyond maxsize.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self._maxsize = maxsize
+        self._matrix: Optional[np.ndarray] = None
+        self._tasks: List[str] = []
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalise(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if vec.ndim != 1 or norm == 0.0:
+            return None
+        return vec / norm
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[Tuple[float, str, str]]:
+        """
+        Return (similarity, task, value) of the closest stored task, or None when empty.
+        """
+        query = self._normalise(embedding)
+        if query is None:
+            return None
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                return None
+            scores = self._matrix @ query
+            best = int(np.argmax(scores))
+            return float(scores[best]), self._tasks[best], self._values[best]
+
+    def add(self, embedding: Sequence[float], task: str, value: str) -> None:
+        row = self._normalise(embedding)
+        if row is None:
+            return
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != row.shape[0]:
+                # first entry, or the embedding model changed: start over
+                self._matrix = row[np.newaxis, :]
+                self._tasks, self._values = [task], [value]
+                return
+            self._matrix = np.vstack((self._matrix, row))
+            self._tasks.append(task)
+            self._values.append(value)
+            if len(self._tasks) > self._maxsize:
+                drop = len(self._tasks) - self._maxsize
+                self._matrix = self._matrix[drop:]
+                del self._tasks[:drop], self._values[:drop]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
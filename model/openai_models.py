@@ -13,6 +13,7 @@ import httpx
 import base64
 
 from model.utils import extract_info
+from ml_models.prompt_cache import PROMPT_CACHE, PromptCache
 
 logging.basicConfig(
     level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -234,7 +235,7 @@ class OpenAILanguageModel(AbstractLanguageModel):
         """
         # logger.info("streaming api")
         start_time = time.time()
-        content = ""
+        parts = []
         # print(messages)
         stream = self.client.chat.completions.create(
             model=model,
@@ -242,12 +243,21 @@ class OpenAILanguageModel(AbstractLanguageModel):
             stream=True,
             temperature=temperature,
         )
+        first_token_time = None
         for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                # print(chunk.choices[0].delta.content, end="")
-                content += chunk.choices[0].delta.content
+            # some compatible endpoints send chunks without choices (e.g. usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token_time is None:
+                    first_token_time = time.time()
+                # print(delta, end="")
+                parts.append(delta)
+        if first_token_time is not None:
+            logger.debug(f"Time to first token: {first_token_time - start_time}")
         logger.debug(f"Time taken: {time.time() - start_time}")
-        return content
+        return "".join(parts)
 
     def filter_emoji(self, text: str) -> str:
         ret_str = []
@@ -286,7 +296,13 @@ class OpenAILanguageModel(AbstractLanguageModel):
         # logger.info(f"using api model {api_model}")
         prompt = str(system_prompt) + "\n" + "\n".join(example_prompt)
         if cache_enabled:
-            content = self.cache_api_call_handler(prompt, max_tokens, temperature, k, stop)
+            # memory first, then the on-disk cache shared with other runs
+            cache_key = PromptCache.key(prompt)
+            content = PROMPT_CACHE.get(cache_key)
+            if content is None:
+                content = self.cache_api_call_handler(prompt, max_tokens, temperature, k, stop)
+                if content is not None:
+                    PROMPT_CACHE.put(cache_key, content)
             if content is not None:
                 return content
         start_time = time.time()
@@ -324,6 +340,7 @@ class OpenAILanguageModel(AbstractLanguageModel):
                 if len(extract_info(content)) == 0:
                     raise Exception(f"content {content} is not json")
             if cache_enabled:
+                PROMPT_CACHE.put(cache_key, content)
                 self.save_cache(prompt, content)
             with open("data/openai.logs", "a") as log_file:
                 log_file.write(
@@ -3,8 +3,9 @@
 #
 # Multi-agent controller for VillagerAgent / VillagerBench.
 # - Uses the original, working env.run + agent_register pattern (bots join server correctly).
-# - Each agent now runs its own infinite task loop in a dedicated worker thread
-#   (no round-robin waiting on other agents).
+# - Each agent runs its own infinite task loop on a pool of worker threads, one
+#   per agent by default (no round-robin waiting on other agents); --max-concurrency
+#   caps the pool so large fleets share a fixed number of threads.
 # - GUI (customtkinter) lets you:
 #     * Add random players (before launch) via "Add New Player" + count dropdown.
 #     * Remove pending players via a red "X" before launch.
@@ -17,92 +18,64 @@
 #     * Live "Task Time" counter (seconds on current task or duration of last task).
 
 import argparse
+import functools
+import hashlib
 import json
+import queue
+import re
 import sys
 import threading
 import time
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Set, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Sequence, Set, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
 
 # ---------------------------------------------------------------------
-# 0. Patch OpenAI ChatCompletions to ignore 'encoding' kwarg
+# Pretty GUI (customtkinter). Imported before the sections below pull in
+# VillagerBench and the LLM stack, so a missing package is reported at once.
 # ---------------------------------------------------------------------
 try:
-    from openai.resources.chat.completions import Completions as _ChatCompletions
-
-    _orig_chat_create = _ChatCompletions.create
-
-    def _patched_chat_create(self, *args, **kwargs):
-        kwargs.pop("encoding", None)
-        return _orig_chat_create(self, *args, **kwargs)
-
-    _ChatCompletions.create = _patched_chat_create
+    import customtkinter as ctk
+except ImportError:
     print(
-        "[INFO] Patched openai.resources.chat.completions.Completions.create "
-        "to ignore 'encoding' kwarg."
+        "[ERROR] This script requires the 'customtkinter' package for the GUI.\n"
+        "Install it with:\n\n"
+        "    pip install customtkinter\n"
     )
-except Exception as e:
-    print("[WARN] Could not patch Completions.create:", e)
-
-# Also patch legacy ChatCompletion.create for safety
-try:
-    import openai as _openai_mod
-
-    if hasattr(_openai_mod, "ChatCompletion"):
-        _orig_legacy_create = _openai_mod.ChatCompletion.create
-
-        def _patched_legacy_create(*args, **kwargs):
-            kwargs.pop("encoding", None)
-            return _orig_legacy_create(*args, **kwargs)
-
-        _openai_mod.ChatCompletion.create = _patched_legacy_create
-        print("[INFO] Patched openai.ChatCompletion.create to ignore 'encoding' kwarg.")
-except Exception as e:
-    print("[WARN] Could not patch openai.ChatCompletion.create:", e)
+    sys.exit(1)
 
 # ---------------------------------------------------------------------
-# 1. Patch requests.Response.json to never crash on bad JSON
+# 0/1. Patch OpenAI 'encoding' kwarg and requests.Response.json (once per interpreter)
 # ---------------------------------------------------------------------
-import requests
-from requests.models import Response as _Resp
-
-_orig_response_json = _Resp.json
-
-
-def _safe_response_json(self, *args, **kwargs):
-    try:
-        return _orig_response_json(self, *args, **kwargs)
-    except Exception as e:
-        text = self.text or ""
-        print(
-            f"[WARN] Response.json failed ({e}); returning stub. "
-            f"Raw (first 200 chars): {text[:200]!r}"
-        )
-        return {"message": text, "status": False, "new_events": []}
+from controller import _patches
 
-
-_Resp.json = _safe_response_json
-print("[INFO] Patched requests.Response.json to return stub on JSON decode error.")
+_patches.apply_all()
 
 # ---------------------------------------------------------------------
 # 2. Imports from VillagerAgent repo
 # ---------------------------------------------------------------------
 from env.env import VillagerBench, env_type, Agent
+from controller.rate_limit import KeyPool
+from controller.task_library import TaskSpec
 from pipeline.data_manager import DataManager
 
-# ---------------------------------------------------------------------
-# 3. Pretty GUI (customtkinter)
-# ---------------------------------------------------------------------
-try:
-    import customtkinter as ctk
-except ImportError:
-    print(
-        "[ERROR] This script requires the 'customtkinter' package for the GUI.\n"
-        "Install it with:\n\n"
-        "    pip install customtkinter\n"
-    )
-    sys.exit(1)
+
+@functools.lru_cache(maxsize=1)
+def _read_api_key_list() -> dict:
+    # Parsed once from raw bytes; load_api_keys and load_rate_limits share the result.
+    try:
+        with open("API_KEY_LIST", "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        print("[ERROR] API_KEY_LIST not found in current directory.")
+        sys.exit(1)
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
 
 def load_api_keys() -> List[str]:
@@ -110,13 +83,7 @@ def load_api_keys() -> List[str]:
     Load an API key from API_KEY_LIST in the current working directory.
     Tries OPENAI first, then AGENT_KEY (for backwards compatibility).
     """
-    try:
-        with open("API_KEY_LIST", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print("[ERROR] API_KEY_LIST not found in current directory.")
-        sys.exit(1)
-
+    data = _read_api_key_list()
     keys = data.get("OPENAI") or data.get("AGENT_KEY") or []
     if not keys:
         print(
@@ -126,6 +93,15 @@ def load_api_keys() -> List[str]:
     return keys
 
 
+def load_rate_limits() -> (Optional[float], Optional[float]):
+    """
+    Per-key limits from the optional "RPM" / "TPM" entries of API_KEY_LIST,
+    e.g. {"OPENAI": [...], "RPM": 500, "TPM": 200000}. Missing entries are None.
+    """
+    data = _read_api_key_list()
+    return data.get("RPM"), data.get("TPM")
+
+
 # ---------------------------------------------------------------------
 # 4. Username generator and task library
 # ---------------------------------------------------------------------
@@ -146,35 +122,54 @@ BASE_USERNAME_STEMS: List[str] = [
 ]
 
 
+# Suffixes stay below this so "CharlieBot_99999" fits Minecraft's 16-char limit.
+USERNAME_SUFFIX_SPACE = 100000
+
+
 class UsernameGenerator:
     """
     Generates random, never-reused usernames based on a base name list.
+
+    Each base counts upward from a random starting suffix, so a new name is
+    unique on the first try; the _used check only skips names handed in
+    through mark_used.
     """
 
     def __init__(self, base_names: List[str]):
         self.base_names = list(base_names)
         self._used: Set[str] = set()
+        self._next_suffix: Dict[str, int] = {
+            base: random.randrange(USERNAME_SUFFIX_SPACE) for base in self.base_names
+        }
 
     def mark_used(self, names: List[str]) -> None:
         for n in names:
             self._used.add(n)
 
     def generate_one(self) -> str:
-        for _ in range(100000):
-            base = random.choice(self.base_names)
-            suffix = random.randint(0, 99999)
-            name = f"{base}_{suffix}"
-            if name not in self._used:
-                self._used.add(name)
-                return name
+        return self._generate_from(random.randrange(len(self.base_names)))
+
+    def _generate_from(self, first: int) -> str:
+        # Start at base index `first`; move to the next only if one is exhausted.
+        for i in range(len(self.base_names)):
+            base = self.base_names[(first + i) % len(self.base_names)]
+            for _ in range(USERNAME_SUFFIX_SPACE):
+                suffix = self._next_suffix[base]
+                self._next_suffix[base] = (suffix + 1) % USERNAME_SUFFIX_SPACE
+                name = f"{base}_{suffix}"
+                if name not in self._used:
+                    self._used.add(name)
+                    return name
         raise RuntimeError("Unable to generate a new unique username.")
 
     def generate_many(self, count: int) -> List[str]:
-        return [self.generate_one() for _ in range(count)]
+        # Draw every starting base in one call; suffixes come from the counters.
+        firsts = random.choices(range(len(self.base_names)), k=count)
+        return [self._generate_from(first) for first in firsts]
 
 
 # Survival-style task curriculum (same as before).
-TASK_LIBRARY: List[Dict[str, str]] = [
+_RAW_TASK_LIBRARY: List[Dict[str, str]] = [
     {
         "id": "gather_wood_and_store",
         "description": (
@@ -288,9 +283,15 @@ TASK_LIBRARY: List[Dict[str, str]] = [
     },
 ]
 
+# Compiled once so the worker loop reads tuple fields instead of dict keys.
+TASK_LIBRARY: Tuple[TaskSpec, ...] = tuple(
+    TaskSpec(sys.intern(task["id"]), sys.intern(task["description"]))
+    for task in _RAW_TASK_LIBRARY
+)
+
 
 # ---------------------------------------------------------------------
-# 5. Agent state & AgentController with per-agent worker threads
+# 5. Agent state & AgentController with a pool of worker threads
 # ---------------------------------------------------------------------
 
 
@@ -303,9 +304,90 @@ class AgentState:
     last_result_short: str = ""
     tasks_completed: int = 0
     next_task_index: int = 0
-    last_started_at: float = 0.0
+    last_started_at: float = 0.0  # time.monotonic() when the current task started
     last_task_duration: float = 0.0  # seconds for most recently completed task
 
+    def snapshot(self) -> "AgentStateSnapshot":
+        return AgentStateSnapshot(
+            self.name,
+            self.current_task_id,
+            self.current_task_description,
+            self.status,
+            self.last_result_short,
+            self.tasks_completed,
+            self.next_task_index,
+            self.last_started_at,
+            self.last_task_duration,
+        )
+
+
+class AgentStateSnapshot(NamedTuple):
+    """
+    Read-only copy of an AgentState, as handed to the GUI thread.
+    """
+
+    name: str
+    current_task_id: str
+    current_task_description: str
+    status: str
+    last_result_short: str
+    tasks_completed: int
+    next_task_index: int
+    last_started_at: float
+    last_task_duration: float
+
+
+# TASK_STATUS line the task prompt asks for; searched case-insensitively in place
+# rather than lowercasing the whole (possibly multi-KB) feedback first.
+_TASK_SUCCESS_RE = re.compile(r"task_status:\s*success", re.IGNORECASE)
+_TASK_FAILED_RE = re.compile(r"task_status:\s*failed", re.IGNORECASE)
+# Folds line breaks and tabs to spaces for the one-line result summary.
+_SUMMARY_WHITESPACE = str.maketrans("\n\r\t", "   ")
+_ELLIPSIS = "..."
+
+
+def _cap(text: str, limit: int) -> str:
+    """
+    ``text`` cut to at most ``limit`` characters, ending in an ellipsis if cut.
+    """
+    return text if len(text) <= limit else text[: limit - len(_ELLIPSIS)] + _ELLIPSIS
+
+
+# Static part of every task prompt. Agent.run already prefixes the instruction
+# with "Your name is <agent>.", so the prefix differs per agent; putting these
+# rules before the task keeps each agent's prefix identical across all of its
+# tasks, which the provider can serve from its prompt cache.
+TASK_PROMPT_RULES = """
+You are a Minecraft agent in a live Minecraft world.
+You can only act by calling tools (Actions) such as scanNearbyEntities, navigateTo,
+MineBlock, placeBlock, craftBlock, withdrawItem, storeItem, SmeltingCooking,
+attackTarget, startFishing, mountEntity, and other tools available in your API.
+
+# Execution guidelines
+- Stay focused on the task given below; do not wander aimlessly or start unrelated projects.
+- Use your tools to gather resources, move, interact, craft, fight, build and farm.
+- Try to keep yourself reasonably safe (avoid lava, big falls, suffocation, drowning).
+- If resources or world conditions make the task impossible or partially doable,
+  clearly explain what is missing and what you managed to do.
+- Use at MOST about 10 Actions (tool calls) before finishing, unless a few more
+  are absolutely necessary.
+
+# When you are done
+- Stop taking new actions and output a single 'Final Answer'.
+- In the Final Answer, briefly summarize:
+  * What you did.
+  * What the world / base looks like now relative to the task.
+- At the end of the Final Answer include exactly one line:
+    TASK_STATUS: success
+  or
+    TASK_STATUS: failed
+
+Once you output the Final Answer with TASK_STATUS, STOP. Do not continue acting.
+"""
+
+# Sent as OpenAI's prompt_cache_key; changes whenever the rules above change.
+TASK_PROMPT_CACHE_KEY = "gui_task_" + hashlib.sha1(TASK_PROMPT_RULES.encode("utf-8")).hexdigest()[:12]
+
 
 class AgentController:
     """
@@ -314,25 +396,46 @@ class AgentController:
     Changes from original:
       - Still uses env.run(...) once, with env.agent_register(...) called once
         BEFORE the controller starts (handled by GUI).
-      - Instead of a single round-robin loop over agents, it now creates
-        ONE worker thread per agent. Each worker thread runs:
+      - Instead of a single round-robin loop over agents, agent names sit in a
+        ready queue served by max_concurrency worker threads (default: one per
+        agent). Each worker runs:
             while not stop:
+                agent_name = ready.get()
                 _run_single_task(agent_name)
-        so agents do not wait on each other at the controller level.
+                ready.put(agent_name)
+        so agents do not wait on each other at the controller level, and at
+        most max_concurrency env.step calls are in flight at once.
     """
 
     def __init__(
         self,
         env: VillagerBench,
         agent_names: List[str],
-        task_library: List[Dict[str, str]],
+        task_library: Sequence[TaskSpec],
+        max_concurrency: int = 0,
     ):
         self.env = env
         self.task_library = task_library
         self.states: Dict[str, AgentState] = {
             name: AgentState(name=name) for name in agent_names
         }
-        self._lock = threading.Lock()
+        # 0 (the default) gives every agent its own worker.
+        if max_concurrency <= 0:
+            max_concurrency = len(agent_names)
+        self.max_concurrency = max(1, min(max_concurrency, len(agent_names)))
+        # Copy of each agent's state as of its last update, read by the GUI without
+        # any lock. Entries are immutable and replaced on every update.
+        self._published: Dict[str, AgentStateSnapshot] = {
+            name: state.snapshot() for name, state in self.states.items()
+        }
+        # Its keys never change after construction, so readers may hold a live view.
+        self._published_view: Mapping[str, AgentStateSnapshot] = MappingProxyType(self._published)
+        self._ready: "queue.Queue[str]" = queue.Queue()
+        for name in agent_names:
+            self._ready.put(name)
+        # One lock per agent: workers only ever touch their own agent's state, so
+        # they never wait on each other.
+        self._locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in agent_names}
         self._stop_event = threading.Event()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._workers: List[threading.Thread] = []
@@ -346,12 +449,16 @@ class AgentController:
         print("[INFO] Stop requested; controller loop will exit after current step.")
         self._stop_event.set()
 
-    def get_states_snapshot(self) -> List[AgentState]:
+    def get_states_mapping(self) -> Mapping[str, AgentStateSnapshot]:
         """
-        Return a shallow copy of agent states for safe use by the GUI thread.
+        Live read-only view of agent name -> latest state, for safe use by the
+        GUI thread. Values are the immutable snapshots published after each
+        update, so no lock is taken and workers never wait on a GUI refresh.
         """
-        with self._lock:
-            return [AgentState(**vars(s)) for s in self.states.values()]
+        return self._published_view
+
+    def _publish_locked(self, state: AgentState) -> None:
+        self._published[state.name] = state.snapshot()
 
     # ---- Internal loop ----------------------------------------------
 
@@ -368,17 +475,14 @@ class AgentController:
 
         # Keep env.run context around all worker threads
         with self.env.run(fast_api=False):
-            # Spawn one worker per agent
-            for name in list(self.states.keys()):
-                worker = threading.Thread(
-                    target=self._worker_loop, args=(name,), daemon=True
-                )
+            # Spawn the worker pool; agents are handed out through the ready queue
+            for _ in range(self.max_concurrency):
+                worker = threading.Thread(target=self._worker_loop, daemon=True)
                 self._workers.append(worker)
                 worker.start()
 
             # Just wait for stop signal; workers do the actual work
-            while not self._stop_event.is_set():
-                time.sleep(0.5)
+            self._stop_event.wait()
 
             # Try to join workers politely
             for worker in self._workers:
@@ -386,57 +490,67 @@ class AgentController:
 
         print("[INFO] AgentController loop exited.")
 
-    def _worker_loop(self, agent_name: str) -> None:
+    def _worker_loop(self) -> None:
         while not self._stop_event.is_set():
+            try:
+                agent_name = self._ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
             try:
                 self._run_single_task(agent_name)
             except Exception as e:
                 # Should be rare since _run_single_task already catches env.step errors.
+                # The agent is not requeued, so it stops like its own worker used to.
                 print(f"[ERROR] Unhandled exception in worker for {agent_name}: {e}")
-                with self._lock:
+                with self._locks[agent_name]:
                     state = self.states.get(agent_name)
                     if state:
                         state.status = "ERROR"
                         state.last_result_short = f"Worker error: {e}"
-                break
+                        self._publish_locked(state)
+                continue
+            self._ready.put(agent_name)
 
     def _run_single_task(self, agent_name: str) -> None:
+        # The states dict never changes after __init__, so look both up once.
+        state = self.states[agent_name]
+        lock = self._locks[agent_name]
+
         # Pick next task and mark state as RUNNING
-        with self._lock:
-            state = self.states[agent_name]
+        with lock:
             task = self._pick_next_task_locked(state)
-            state.current_task_id = task["id"]
-            state.current_task_description = task["description"]
+            state.current_task_id = task.id
+            state.current_task_description = task.description
             state.status = "RUNNING"
-            now = time.time()
+            now = time.monotonic()
             state.last_started_at = now
             start_time = now
+            self._publish_locked(state)
 
-        instruction = self._build_task_prompt(agent_name, task["description"])
+        instruction = self._build_task_prompt(agent_name, task)
 
         try:
             feedback, detail = self.env.step(agent_name, instruction)
         except Exception as e:
-            with self._lock:
-                state = self.states[agent_name]
+            with lock:
                 state.status = "ERROR"
                 state.last_result_short = f"env.step error: {e}"
-                state.last_task_duration = max(0.0, time.time() - start_time)
+                state.last_task_duration = time.monotonic() - start_time
+                self._publish_locked(state)
             return
 
         status, summary = self._parse_feedback(feedback)
-        finish_time = time.time()
-        duration = max(0.0, finish_time - start_time)
+        duration = time.monotonic() - start_time
 
-        with self._lock:
-            state = self.states[agent_name]
+        with lock:
             state.status = status
             state.last_result_short = summary
             state.last_task_duration = duration
             if status == "SUCCESS":
                 state.tasks_completed += 1
+            self._publish_locked(state)
 
-    def _pick_next_task_locked(self, state: AgentState) -> Dict[str, str]:
+    def _pick_next_task_locked(self, state: AgentState) -> TaskSpec:
         """
         Simple curriculum: cycle through TASK_LIBRARY in order per agent.
         """
@@ -447,40 +561,21 @@ class AgentController:
         return self.task_library[idx]
 
     @staticmethod
-    def _build_task_prompt(agent_name: str, task_description: str) -> str:
+    @functools.lru_cache(maxsize=1024)
+    def _build_task_prompt(agent_name: str, task: TaskSpec) -> str:
         """
         Wrap the high-level task in an instruction that the BaseAgent pipeline
         can follow, including a termination protocol we can parse.
+
+        Agents cycle through a small task library, so each (agent, task) prompt
+        is built once and the same string is reused on every later round.
         """
-        return f"""
-You are {agent_name}, a Minecraft agent in a live Minecraft world.
-You can only act by calling tools (Actions) such as scanNearbyEntities, navigateTo,
-MineBlock, placeBlock, craftBlock, withdrawItem, storeItem, SmeltingCooking,
-attackTarget, startFishing, mountEntity, and other tools available in your API.
+        return f"""{TASK_PROMPT_RULES}
+# Who you are
+You are {agent_name}.
 
 # High-level task
-{task_description}
-
-# Execution guidelines
-- Stay focused on this task; do not wander aimlessly or start unrelated projects.
-- Use your tools to gather resources, move, interact, craft, fight, build and farm.
-- Try to keep yourself reasonably safe (avoid lava, big falls, suffocation, drowning).
-- If resources or world conditions make the task impossible or partially doable,
-  clearly explain what is missing and what you managed to do.
-- Use at MOST about 10 Actions (tool calls) before finishing, unless a few more
-  are absolutely necessary.
-
-# When you are done
-- Stop taking new actions and output a single 'Final Answer'.
-- In the Final Answer, briefly summarize:
-  * What you did.
-  * What the world / base looks like now relative to the task.
-- At the end of the Final Answer include exactly one line:
-    TASK_STATUS: success
-  or
-    TASK_STATUS: failed
-
-Once you output the Final Answer with TASK_STATUS, STOP. Do not continue acting.
+{task.description}
 """
 
     @staticmethod
@@ -498,17 +593,15 @@ Once you output the Final Answer with TASK_STATUS, STOP. Do not continue acting.
         else:
             feedback_str = feedback
 
-        normalized = feedback_str.lower()
-        if "task_status: success" in normalized:
+        if _TASK_SUCCESS_RE.search(feedback_str):
             status = "SUCCESS"
-        elif "task_status: failed" in normalized:
+        elif _TASK_FAILED_RE.search(feedback_str):
             status = "FAILED"
         else:
             status = "DONE"
 
-        summary = feedback_str.strip().replace("\n", " ")
-        if len(summary) > 160:
-            summary = summary[:157] + "..."
+        # Truncate first so only the displayed part is translated.
+        summary = _cap(feedback_str.strip(), 160).translate(_SUMMARY_WHITESPACE)
 
         return status, summary
 
@@ -517,6 +610,18 @@ Once you output the Final Answer with TASK_STATUS, STOP. Do not continue acting.
 # 6. customtkinter GUI wrapper (with Task Time column)
 # ---------------------------------------------------------------------
 
+# Status pill colors; AgentController always sets statuses in upper case.
+STATUS_COLORS: Dict[str, str] = {
+    "SUCCESS": "#2e7d32",  # green
+    "DONE": "#2e7d32",
+    "FAILED": "#c62828",  # red
+    "ERROR": "#c62828",
+    "RUNNING": "#1565c0",  # blue
+    "IDLE": "#3b3b3b",
+    "PENDING": "#f9a825",
+}
+DEFAULT_STATUS_COLOR = "#3b3b3b"
+
 
 class AgentGUI(ctk.CTk):
     """
@@ -528,19 +633,25 @@ class AgentGUI(ctk.CTk):
       2. (Optional) Remove any queued player with the red "X".
       3. Click "Launch Agents" to:
          - Call env.agent_register(...) ONCE with the full list.
-         - Start AgentController (which does env.run(...) and per-agent threads).
+         - Start AgentController (which does env.run(...) and its worker threads).
          - Disable Add / X / Launch buttons.
       4. After launch, rows show status, current task, last result, and live
          "Task Time" for each agent.
+
+    The view polls every active_refresh_interval_ms while any agent is RUNNING
+    (so its clock ticks smoothly) and backs off to refresh_interval_ms when
+    nothing is running.
     """
 
     def __init__(
         self,
         env: VillagerBench,
         agent_tool: List,
-        task_library: List[Dict[str, str]],
+        task_library: Sequence[TaskSpec],
         username_gen: UsernameGenerator,
         refresh_interval_ms: int = 1000,
+        max_concurrency: int = 0,
+        active_refresh_interval_ms: int = 100,
     ):
         super().__init__()
 
@@ -549,9 +660,12 @@ class AgentGUI(ctk.CTk):
         self.task_library = task_library
         self.username_gen = username_gen
         self.refresh_interval_ms = refresh_interval_ms
+        self.active_refresh_interval_ms = min(active_refresh_interval_ms, refresh_interval_ms)
+        self.max_concurrency = max_concurrency
 
         self.agent_names: List[str] = []  # queued names
         self.controller: Optional[AgentController] = None
+        self._fonts: Dict[Tuple[int, str, str], ctk.CTkFont] = {}
 
         # --- Window / theme ------------------------------------------
         self.title("VillagerAgent Multi-Agent Control Panel")
@@ -575,14 +689,14 @@ class AgentGUI(ctk.CTk):
         title_label = ctk.CTkLabel(
             header_frame,
             text="VillagerAgent Multi-Agent Control Panel",
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=self._font(size=20, weight="bold"),
         )
         title_label.grid(row=0, column=0, sticky="w")
 
         subtitle_label = ctk.CTkLabel(
             header_frame,
             text="Queue players, then launch them into your server. Each agent runs independently.",
-            font=ctk.CTkFont(size=12),
+            font=self._font(size=12),
         )
         subtitle_label.grid(row=1, column=0, sticky="w", pady=(2, 0))
 
@@ -590,7 +704,7 @@ class AgentGUI(ctk.CTk):
         add_count_label = ctk.CTkLabel(
             header_frame,
             text="Players to add:",
-            font=ctk.CTkFont(size=12),
+            font=self._font(size=12),
         )
         add_count_label.grid(row=0, column=1, padx=(20, 4), sticky="e")
 
@@ -623,7 +737,7 @@ class AgentGUI(ctk.CTk):
         info_label = ctk.CTkLabel(
             header_frame,
             text="Tip: You can only add/remove players before launching. Close the window to stop everything.",
-            font=ctk.CTkFont(size=11, slant="italic"),
+            font=self._font(size=11, slant="italic"),
         )
         info_label.grid(row=1, column=1, columnspan=4, sticky="e")
 
@@ -641,42 +755,42 @@ class AgentGUI(ctk.CTk):
         h_name = ctk.CTkLabel(
             header_bar,
             text="Agent",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_name.grid(row=0, column=0, sticky="w", padx=(8, 4))
 
         h_status = ctk.CTkLabel(
             header_bar,
             text="Status",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_status.grid(row=0, column=1, sticky="w", padx=(4, 4))
 
         h_task = ctk.CTkLabel(
             header_bar,
             text="Current Task",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_task.grid(row=0, column=2, sticky="w", padx=(4, 4))
 
         h_time = ctk.CTkLabel(
             header_bar,
             text="Task Time",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_time.grid(row=0, column=3, sticky="w", padx=(4, 4))
 
         h_result = ctk.CTkLabel(
             header_bar,
             text="Last Result",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_result.grid(row=0, column=4, sticky="w", padx=(4, 4))
 
         h_actions = ctk.CTkLabel(
             header_bar,
             text="",
-            font=ctk.CTkFont(size=13, weight="bold"),
+            font=self._font(size=13, weight="bold"),
         )
         h_actions.grid(row=0, column=5, sticky="e", padx=(4, 8))
 
@@ -686,6 +800,7 @@ class AgentGUI(ctk.CTk):
 
         # Map: agent_name -> dict of widgets
         self.rows: Dict[str, Dict[str, object]] = {}
+        self._laid_out_names: List[str] = []  # row order last applied by _refresh
 
         # Wire close event
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -695,6 +810,15 @@ class AgentGUI(ctk.CTk):
 
     # --- GUI interactions --------------------------------------------
 
+    def _font(self, size: int, weight: str = "normal", slant: str = "roman") -> ctk.CTkFont:
+        # One CTkFont per distinct style, shared by every widget that uses it,
+        # instead of a new Tk font per label and per row.
+        key = (size, weight, slant)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = ctk.CTkFont(size=size, weight=weight, slant=slant)
+        return font
+
     def _on_close(self):
         if self.controller is not None:
             self.controller.stop()
@@ -715,7 +839,7 @@ class AgentGUI(ctk.CTk):
             self._ensure_row(name)
             row = self.rows[name]
             status_label: ctk.CTkLabel = row["status_label"]  # type: ignore[assignment]
-            status_label.configure(text="PENDING", fg_color="#f9a825")
+            status_label.configure(text="PENDING", fg_color=STATUS_COLORS["PENDING"])
 
     def _on_launch_clicked(self):
         # Only launch once
@@ -738,7 +862,10 @@ class AgentGUI(ctk.CTk):
         )
 
         self.controller = AgentController(
-            self.env, list(self.agent_names), self.task_library
+            self.env,
+            list(self.agent_names),
+            self.task_library,
+            max_concurrency=self.max_concurrency,
         )
         self.controller.start()
 
@@ -778,141 +905,193 @@ class AgentGUI(ctk.CTk):
         frame.grid_columnconfigure(5, weight=0)  # actions
 
         name_label = ctk.CTkLabel(
-            frame, text=agent_name, font=ctk.CTkFont(size=14, weight="bold")
+            frame, text=agent_name, font=self._font(size=14, weight="bold")
         )
         name_label.grid(row=0, column=0, sticky="w", padx=(10, 6), pady=4)
 
         status_label = ctk.CTkLabel(
             frame,
             text="PENDING",
-            font=ctk.CTkFont(size=12, weight="bold"),
+            font=self._font(size=12, weight="bold"),
             corner_radius=999,
-            fg_color="#f9a825",
+            fg_color=STATUS_COLORS["PENDING"],
             padx=12,
             pady=4,
         )
         status_label.grid(row=0, column=1, sticky="w", padx=(4, 4), pady=4)
 
+        remove_button = ctk.CTkButton(
+            frame,
+            text="✕",
+            width=32,
+            height=32,
+            fg_color="#b3261e",
+            hover_color="#d32f2f",
+            font=self._font(size=16, weight="bold"),
+            command=lambda n=agent_name: self._on_remove_clicked(n),
+        )
+        remove_button.grid(row=0, column=5, sticky="e", padx=(4, 10), pady=4)
+
+        self.rows[agent_name] = {
+            "frame": frame,
+            "name_label": name_label,
+            "status_label": status_label,
+            "remove_button": remove_button,
+            "_materialized": False,
+        }
+
+    def _materialize_row(self, row: Dict[str, object]) -> None:
+        """
+        Build the task / time / result cells of a row. Queued rows only carry
+        the name, status pill and remove button; the rest is created the first
+        time the agent leaves IDLE, so long queues stay cheap.
+        """
+        frame: ctk.CTkFrame = row["frame"]  # type: ignore[assignment]
+
+        # Frequently changing cells are bound to StringVars, so a refresh is a
+        # variable write instead of a CTkLabel.configure() redraw.
+        task_var = ctk.StringVar(value="")
+        time_var = ctk.StringVar(value="0.0s")
+        result_var = ctk.StringVar(value="")
+
         task_label = ctk.CTkLabel(
             frame,
-            text="",
-            font=ctk.CTkFont(size=12),
+            textvariable=task_var,
+            font=self._font(size=12),
             anchor="w",
         )
         task_label.grid(row=0, column=2, sticky="w", padx=(4, 4), pady=4)
 
         time_label = ctk.CTkLabel(
             frame,
-            text="0.0s",
-            font=ctk.CTkFont(size=12, weight="bold"),
+            textvariable=time_var,
+            font=self._font(size=12, weight="bold"),
             anchor="w",
         )
         time_label.grid(row=0, column=3, sticky="w", padx=(4, 4), pady=4)
 
         result_label = ctk.CTkLabel(
             frame,
-            text="",
-            font=ctk.CTkFont(size=12),
+            textvariable=result_var,
+            font=self._font(size=12),
             anchor="w",
             wraplength=420,
             justify="left",
         )
         result_label.grid(row=0, column=4, sticky="w", padx=(4, 4), pady=4)
 
-        remove_button = ctk.CTkButton(
-            frame,
-            text="✕",
-            width=32,
-            height=32,
-            fg_color="#b3261e",
-            hover_color="#d32f2f",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            command=lambda n=agent_name: self._on_remove_clicked(n),
+        row.update(
+            task_label=task_label,
+            time_label=time_label,
+            result_label=result_label,
+            task_var=task_var,
+            time_var=time_var,
+            result_var=result_var,
+            _materialized=True,
         )
-        remove_button.grid(row=0, column=5, sticky="e", padx=(4, 10), pady=4)
 
-        self.rows[agent_name] = {
-            "frame": frame,
-            "name_label": name_label,
-            "status_label": status_label,
-            "task_label": task_label,
-            "time_label": time_label,
-            "result_label": result_label,
-            "remove_button": remove_button,
-        }
+    @staticmethod
+    def _set_cell(row: Dict[str, object], key: str, value: str) -> None:
+        """
+        Write ``value`` to the row's ``key`` StringVar unless it already shows it;
+        every set() is a Tcl round trip even when the text is unchanged.
+        """
+        cache_key = f"_last_{key}"
+        if row.get(cache_key) != value:
+            row[cache_key] = value
+            row[key].set(value)  # type: ignore[union-attr]
+
+    def _tick_clock(self, row: Dict[str, object], elapsed: float) -> None:
+        # The clock shows tenths; skip formatting until the tenths digit moves.
+        tenths = int(elapsed * 10)
+        if tenths != row.get("_last_tenths"):
+            row["_last_tenths"] = tenths
+            self._set_cell(row, "time_var", f"{tenths / 10:5.1f}s")
 
     def _status_color(self, status: str) -> str:
-        status = status.upper()
-        if status in ("SUCCESS", "DONE"):
-            return "#2e7d32"  # green
-        if status in ("FAILED", "ERROR"):
-            return "#c62828"  # red
-        if status == "RUNNING":
-            return "#1565c0"  # blue
-        if status == "IDLE":
-            return "#3b3b3b"
-        if status == "PENDING":
-            return "#f9a825"
-        return "#3b3b3b"
+        return STATUS_COLORS.get(status, DEFAULT_STATUS_COLOR)
 
     def _refresh(self):
-        # Lay out rows in order (queued list first)
-        for idx, name in enumerate(self.agent_names):
-            if name in self.rows:
-                frame = self.rows[name]["frame"]
-                frame.grid(row=idx, column=0, sticky="ew", padx=4, pady=4)
+        # Minimised or withdrawn: nothing would be seen, so skip the row updates
+        # and check back at the idle rate.
+        if self.state() in ("iconic", "withdrawn") or not self.winfo_viewable():
+            self.after(self.refresh_interval_ms, self._refresh)
+            return
+
+        # Lay out rows in order (queued list first). Only when the list changed,
+        # and then only the rows whose position moved (e.g. below a removed one).
+        if self.agent_names != self._laid_out_names:
+            for idx, name in enumerate(self.agent_names):
+                row = self.rows.get(name)
+                if row is not None and row.get("_grid_row") != idx:
+                    row["frame"].grid(row=idx, column=0, sticky="ew", padx=4, pady=4)  # type: ignore[union-attr]
+                    row["_grid_row"] = idx
+            self._laid_out_names = list(self.agent_names)
+
+        any_running = False
 
         # Once controller is running, pull live states
         if self.controller is not None:
-            states = self.controller.get_states_snapshot()
-            states_by_name = {s.name: s for s in states}
-            now = time.time()
+            states_by_name = self.controller.get_states_mapping()
+            now = time.monotonic()
 
             for name, row in self.rows.items():
                 status_label: ctk.CTkLabel = row["status_label"]  # type: ignore[assignment]
-                task_label: ctk.CTkLabel = row["task_label"]  # type: ignore[assignment]
-                time_label: ctk.CTkLabel = row["time_label"]  # type: ignore[assignment]
-                result_label: ctk.CTkLabel = row["result_label"]  # type: ignore[assignment]
 
                 state = states_by_name.get(name)
                 if state is None:
                     continue
+                if state.status == "RUNNING":
+                    any_running = True
+
+                # Snapshots are replaced on every update, so the same object means
+                # nothing changed; only a running task's clock still needs a tick.
+                if row.get("applied_state") is state:
+                    if state.status == "RUNNING" and state.last_started_at > 0:
+                        self._tick_clock(row, now - state.last_started_at)
+                    continue
+                row["applied_state"] = state
 
-                # Update status pill
+                # Update status pill (its color needs configure, so only on change)
                 status_text = state.status
-                status_label.configure(
-                    text=status_text, fg_color=self._status_color(status_text)
-                )
-
-                # Task display
-                task_display = state.current_task_id or ""
-                if state.current_task_description:
-                    desc = state.current_task_description.replace("\n", " ")
-                    if len(desc) > 60:
-                        desc = desc[:57] + "..."
-                    if task_display:
-                        task_display = f"{task_display}: {desc}"
-                    else:
-                        task_display = desc
-                task_label.configure(text=task_display)
+                if row.get("applied_status") != status_text:
+                    row["applied_status"] = status_text
+                    status_label.configure(
+                        text=status_text, fg_color=self._status_color(status_text)
+                    )
+
+                if not row["_materialized"]:
+                    if status_text == "IDLE":
+                        continue
+                    self._materialize_row(row)
+
+                # Task display; most snapshots only change status or result, so
+                # rebuild the text only when the task itself changed.
+                task_key = (state.current_task_id, state.current_task_description)
+                if row.get("_task_key") != task_key:
+                    row["_task_key"] = task_key
+                    task_display = state.current_task_id or ""
+                    if state.current_task_description:
+                        desc = _cap(state.current_task_description.replace("\n", " "), 60)
+                        task_display = f"{task_display}: {desc}" if task_display else desc
+                    self._set_cell(row, "task_var", task_display)
 
                 # Task time
                 if state.status == "RUNNING" and state.last_started_at > 0:
-                    elapsed = max(0.0, now - state.last_started_at)
-                    time_label.configure(text=f"{elapsed:5.1f}s")
+                    self._tick_clock(row, now - state.last_started_at)
                 else:
+                    row["_last_tenths"] = None
                     if state.last_task_duration > 0:
-                        time_label.configure(text=f"{state.last_task_duration:5.1f}s")
+                        self._set_cell(row, "time_var", f"{state.last_task_duration:5.1f}s")
                     else:
-                        time_label.configure(text="—")
+                        self._set_cell(row, "time_var", "—")
 
                 # Result display
-                result_display = state.last_result_short or ""
-                if len(result_display) > 120:
-                    result_display = result_display[:117] + "..."
-                result_label.configure(text=result_display)
+                result_display = _cap(state.last_result_short or "", 120)
+                self._set_cell(row, "result_var", result_display)
 
-        self.after(self.refresh_interval_ms, self._refresh)
+        next_ms = self.active_refresh_interval_ms if any_running else self.refresh_interval_ms
+        self.after(next_ms, self._refresh)
 
 
 # ---------------------------------------------------------------------
@@ -957,6 +1136,12 @@ def main():
         default="gpt-4o-mini",
         help="OpenAI model name to use for Agent.model.",
     )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=0,
+        help="Worker threads shared by all agents (default: one per agent).",
+    )
 
     args = parser.parse_args()
 
@@ -968,6 +1153,19 @@ def main():
     Agent.model = model_name
     Agent.base_url = base_url
     Agent.api_key_list = api_key_list
+    Agent.prompt_cache_key = TASK_PROMPT_CACHE_KEY
+
+    # Spread agent steps over every key and pace each key's chat completions
+    # instead of retrying 429s
+    rpm, tpm = load_rate_limits()
+    key_pool = KeyPool(api_key_list, rpm=rpm, tpm=tpm)
+    Agent.key_pool = key_pool
+    _patches.set_key_pool(key_pool)
+    if rpm or tpm:
+        print(
+            f"[INFO] Rate limit per key ({len(key_pool.keys)} key(s)): "
+            f"{rpm or 'unlimited'} requests/min, {tpm or 'unlimited'} tokens/min."
+        )
 
     if args.env_type == "none":
         env_t = env_type.none
@@ -1037,7 +1235,9 @@ def main():
     print("==============================================")
 
     username_gen = UsernameGenerator(BASE_USERNAME_STEMS)
-    app = AgentGUI(env, agent_tool, TASK_LIBRARY, username_gen)
+    app = AgentGUI(
+        env, agent_tool, TASK_LIBRARY, username_gen, max_concurrency=args.max_concurrency
+    )
     app.mainloop()
 
 
@@ -9,19 +9,20 @@ can safely drive many agents in parallel without sharing the fragile JS barrier.
 from __future__ import annotations
 
 import argparse
+import multiprocessing as mp
 import os
 import signal
+from multiprocessing.connection import wait
 from pathlib import Path
 from typing import List
 
 from controller.multiprocess_core import (
-    DEFAULT_SHORT_TASK_TEMPLATE,
     WorkerConfig,
+    join_workers,
     load_api_keys,
     resolve_env_type,
     spawn_workers,
 )
-from controller.task_library import TASK_LIBRARY
 from controller.name_pool import JsonNamePool
 
 
@@ -56,7 +57,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--llm-model", type=str, default=os.environ.get("VILLAGER_AGENT_MODEL", "gpt-4-1106-preview"))
     parser.add_argument("--llm-base-url", type=str, default=os.environ.get("VILLAGER_AGENT_BASE_URL", "https://api.openai.com/v1"))
     parser.add_argument("--clear-logs", action="store_true", help="Allow each worker to wipe logs/metrics.")
-    parser.add_argument("--task-template", type=str, default=DEFAULT_SHORT_TASK_TEMPLATE)
+    parser.add_argument("--task-template", type=str, default=None, help="Override the default worker prompt template.")
     return parser.parse_args()
 
 
@@ -96,28 +97,34 @@ def main() -> None:
                 api_keys=api_keys,
                 clear_logs=args.clear_logs,
                 task_template=args.task_template,
-                task_library=TASK_LIBRARY,
             )
         )
 
     workers, stop_event = spawn_workers(configs)
     print(f"[MAIN] Spawned {len(workers)} worker process(es).")
 
+    # Self-pipe in the wait set: wait() resumes after a signal handler returns,
+    # so the handler writes here to wake the main loop.
+    wake_reader, wake_writer = mp.Pipe(duplex=False)
+
     def shutdown_handler(signum, frame):
         print(f"\n[MAIN] Received signal {signum}; stopping workers...")
         stop_event.set()
+        wake_writer.send_bytes(b"")
 
     signal.signal(signal.SIGINT, shutdown_handler)
     signal.signal(signal.SIGTERM, shutdown_handler)
 
     try:
-        while any(p.is_alive() for p in workers):
-            for p in workers:
-                p.join(timeout=0.5)
+        # Block in the kernel until a worker exits or a signal arrives.
+        sentinels = [p.sentinel for p in workers]
+        while sentinels and not stop_event.is_set():
+            for ready in wait(sentinels + [wake_reader]):
+                if ready is not wake_reader:
+                    sentinels.remove(ready)
     finally:
         stop_event.set()
-        for p in workers:
-            p.join(timeout=5.0)
+        join_workers(workers, timeout=5.0)
 
 
 if __name__ == "__main__":
@@ -55,6 +55,7 @@ class BaseAgent:
         self.RL_mode = RL_mode
         self.logger = logger
         self.all_tools = all_tools
+        self.tools_by_name = {tool.name: tool for tool in all_tools}
         if not env.running:
             BaseAgent._virtual_debug = True
 
@@ -525,11 +526,7 @@ class BaseAgent:
                 final_answer = tool_input['final_answer']
                 break
             
-            target_tool = None
-            for tool in self.all_tools:
-                if tool.name == func_name:
-                    target_tool = tool
-                    break
+            target_tool = self.tools_by_name.get(func_name)
             if target_tool is None:
                 continue
             feedback = target_tool(tool_input)
@@ -76,6 +76,8 @@ class GlobalController:
 
         # init thread pool
         self.executor = ThreadPoolExecutor(max_workers=max_workers)  # adjust max_workers to control the number of threads
+        # reflections of tasks that finish together are independent LLM calls, run them side by side
+        self.reflect_executor = ThreadPoolExecutor(max_workers=max_workers)
 
         # max task time for each task in seconds
         self.max_task_time = 60 * 30 # 30 minutes
@@ -297,11 +299,14 @@ class GlobalController:
                 return task
         return None
     
-    def update_feedback(self, task, agent, detail):
-        
+    def update_feedback(self, task, agent, detail, tag=None):
+        '''
+        tag: reflection result computed ahead of time, None to reflect here
+        '''
         collab = next((c for c in self.collab_list if c["task"] == task.id), None)
         if collab == None:
-            tag = agent.reflect(task, detail)
+            if tag is None:
+                tag = agent.reflect(task, detail)
             task.status = Task.success if tag else Task.failure
             self.set_task_status(task.id, task.status, detail)
 
@@ -317,7 +322,8 @@ class GlobalController:
             return
         else:
             collab["complete agent"] += 1
-            tag = agent.reflect(task, detail)
+            if tag is None:
+                tag = agent.reflect(task, detail)
             task.status = Task.success if tag else Task.failure
             self.set_task_status(task.id, Task.success if tag else Task.failure, task.reflect)
 
@@ -393,6 +399,17 @@ class GlobalController:
                 break
 
             with self.result_list_lock:
+                # start the reflections of every task that already finished at once;
+                # collab tasks are left to update_feedback, since their agents share
+                # one Task and the recorded task.reflect must be this agent's own
+                collab_ids = {c["task"] for c in self.collab_list}
+                finished = [(future, agent, task) for future, agent, task, _ in self.result_queue
+                            if future.done() and future.exception() is None and task.id not in collab_ids]
+                reflections = {}
+                if len(finished) > 1:
+                    reflections = {id(future): self.reflect_executor.submit(agent.reflect, task, future.result()[1])
+                                   for future, agent, task in finished}
+
                 result_list_copy = []
                 for future, agent, task, start_time in self.result_queue:
                     # if future.done() and task.id in [t.id for t in self.task_list] and task.status == Task.running:
@@ -406,13 +423,16 @@ class GlobalController:
                         try:
                             self.logger.info(f"Task {task.description} finished!")
                             _, detail = future.result()
-                            self.update_feedback(task, agent, detail)
+                            reflection = reflections.get(id(future))
+                            tag = reflection.result() if reflection is not None else None
+                            self.update_feedback(task, agent, detail, tag=tag)
                         except KeyboardInterrupt:
                             self.shutdown = True
                             self.max_execution_time = 0
                             self.task_manager = None
                             self.data_manager = None
                             self.executor.shutdown(wait=False)
+                            self.reflect_executor.shutdown(wait=False)
                             raise Exception("Interrupted by user")
                         except ConnectionError as e:
                             self.shutdown = True
@@ -420,6 +440,7 @@ class GlobalController:
                             self.task_manager = None
                             self.data_manager = None
                             self.executor.shutdown(wait=False)
+                            self.reflect_executor.shutdown(wait=False)
                             raise Exception("ConnectionError")
                         except ConnectionRefusedError as e:
                             self.shutdown = True
@@ -427,6 +448,7 @@ class GlobalController:
                             self.task_manager = None
                             self.data_manager = None
                             self.executor.shutdown(wait=False)
+                            self.reflect_executor.shutdown(wait=False)
                             raise Exception("ConnectionRefusedError")
                         except Exception as e: # 没有对于 collab 的处理 这个代码不正确
                             traceback.print_exception(type(e), e, e.__traceback__)
@@ -533,6 +555,7 @@ class GlobalController:
             self.task_manager = None
             self.data_manager = None
             self.executor.shutdown(wait=False)
+            self.reflect_executor.shutdown(wait=False)
             raise Exception("Interrupted by user")
 
     def run(self):
@@ -556,5 +579,6 @@ class GlobalController:
             self.data_manager = None
             # shutdown thread pool
             self.executor.shutdown(wait=False)
+            self.reflect_executor.shutdown(wait=False)
             # raise exception
             raise Exception("Interrupted by user")
\ No newline at end of file
@@ -43,6 +43,8 @@ class DataManager:
             self._history_data = self._load_json(self._history_path)
             self._env_data = self._load_json(self._env_path)
             self._agent_data = self._load_json(self._agent_path)
+        # hashable view of blocks_info for O(1) duplicate checks when merging scans
+        self._block_keys = {self._block_key(block) for block in (self._env_data or {}).get("blocks_info", [])}
 
         self.llm = None
         self.model = model_name
@@ -243,6 +245,22 @@ class DataManager:
             "status": status
         }
 
+    @staticmethod
+    def _block_key(value):
+        # blocks are small dicts like {"chest": [-4, -60, 0], "facing": "W"}
+        if isinstance(value, dict):
+            return tuple(sorted((k, DataManager._block_key(v)) for k, v in value.items()))
+        if isinstance(value, list):
+            return tuple(DataManager._block_key(v) for v in value)
+        return value
+
+    def _merge_blocks(self, blocks: list):
+        for block in blocks:
+            key = self._block_key(block)
+            if key not in self._block_keys:
+                self._block_keys.add(key)
+                self._env_data["blocks_info"].append(block)
+
     @staticmethod
     def _load_json(json_path: str):
         if (not os.path.exists(json_path)) or os.path.getsize(json_path) == 0:
@@ -282,7 +300,7 @@ class DataManager:
 
     def update_database_init(self, info: list):
         self._logger.debug("=" * 20 + " Update Database Init " + "=" * 20)
-        self._logger.info(f"gathering info data: \n{info}")
+        self._logger.info("gathering info data: \n%s", info)
         # print(info)
         new_info = info.copy()
         for item in new_info:
@@ -306,9 +324,7 @@ class DataManager:
                     self._env_data["person_info"].pop(i)
                     break
             self._env_data["person_info"].append(env["person_info"])
-            for block in env["blocks_info"]:
-                if block not in self._env_data["blocks_info"]:
-                    self._env_data["blocks_info"].append(block)
+            self._merge_blocks(env["blocks_info"])
             self._env_data["sign_info"] = env["sign_info"]
             self._env_data["time"] = env["time"]
             self._env_data["nearby_entities"] = env["nearby_entities"]
@@ -355,9 +371,7 @@ class DataManager:
                 self._env_data["person_info"].pop(i)
                 break
         self._env_data["person_info"].append(env["person_info"])
-        for block in env["blocks_info"]:
-            if block not in self._env_data["blocks_info"]:
-                self._env_data["blocks_info"].append(block)
+        self._merge_blocks(env["blocks_info"])
         self._env_data["sign_info"] = env["sign_info"]
         self._env_data["time"] = env["time"]
         self._env_data["nearby_entities"] = env["nearby_entities"]
@@ -397,7 +411,7 @@ class DataManager:
                                                            example_prompt=prompt,
                                                            cache_enabled=False,
                                                            max_tokens=512)
-        self._logger.debug(f"Update history: {response}")
+        self._logger.debug("Update history: %s", response)
         self.update_history_log("You are a helpful assistant in Minecraft.", prompt, response)
         self._history_data[history["name"]] = response
         self._logger.info(f"Update history {history['name']} successfully")
@@ -425,14 +439,14 @@ class DataManager:
                                                              position=person["position"],
                                                              items=items_str)
         blocks_info_str = ""
-        flag = []  # 用于去重
+        flag = set()  # 用于去重
         for i, block_info in enumerate(self._env_data["blocks_info"]):
             for j, (key, value) in enumerate(block_info.items()):
                 if key in flag:
                     continue
                 else:
                     if key not in ["facing"]:
-                        flag.append(key)
+                        flag.add(key)
                         if i != 0:
                             blocks_info_str += ", "
                         blocks_info_str += f"{key}"
@@ -478,8 +492,8 @@ class DataManager:
         example_prompt = SUMMARY_ENVIRONMENT_EXAMPLE_PROMPT.copy()
         example_prompt[-1] = example_prompt[-1].format(environment_info=self._env_data,
                                                        task=task + str(self._env_data["sign_info"]))
-        self._logger.debug(f"System prompt: {system_prompt}")
-        self._logger.debug(f"Example prompt: {example_prompt}")
+        self._logger.debug("System prompt: %s", system_prompt)
+        self._logger.debug("Example prompt: %s", example_prompt)
         if isinstance(self.llm, OpenAILanguageModel):
             response = self.llm.few_shot_generate_thoughts(system_prompt=system_prompt,
                                                            example_prompt=example_prompt,
@@ -492,7 +506,7 @@ class DataManager:
                                                            max_tokens=256)
         # print(example_prompt)
         # print(response)
-        self._logger.debug(f"Response: {response}")
+        self._logger.debug("Response: %s", response)
         self.update_query_log(system_prompt, example_prompt, response)
         self.last_env_response = response + "\nSign info: " + self._env_data["sign_info"]
         return response + "\nSign info: " + self._env_data["sign_info"]